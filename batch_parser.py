@@ -0,0 +1,439 @@
+import struct
+from collections import Counter
+from typing import Iterable, List
+
+import numpy as np
+
+from command_parser import (
+    EXPECTED_LENGTHS,
+    NON_NEGATIVE_FIELDS,
+    REJECT_BAD_LENGTH,
+    REJECT_OUT_OF_RANGE,
+    REJECT_UNKNOWN_COMMAND,
+    validate_packet,
+)
+from viewport import Viewport
+
+# Розкладка параметрів команд фіксованої довжини (big-endian, як у протоколі)
+COMMAND_DTYPES = {
+    0x01: np.dtype([('color', '>u2')]),
+    0x02: np.dtype([('x', '>i2'), ('y', '>i2'), ('color', '>u2')]),
+    0x03: np.dtype([('x0', '>i2'), ('y0', '>i2'), ('x1', '>i2'), ('y1', '>i2'), ('color', '>u2')]),
+    0x04: np.dtype([('x0', '>i2'), ('y0', '>i2'), ('w', '>i2'), ('h', '>i2'), ('color', '>u2')]),
+    0x05: np.dtype([('x0', '>i2'), ('y0', '>i2'), ('w', '>i2'), ('h', '>i2'), ('color', '>u2')]),
+    0x06: np.dtype([('x0', '>i2'), ('y0', '>i2'), ('radius_x', '>i2'), ('radius_y', '>i2'), ('color', '>u2')]),
+    0x07: np.dtype([('x0', '>i2'), ('y0', '>i2'), ('radius_x', '>i2'), ('radius_y', '>i2'), ('color', '>u2')]),
+    0x08: np.dtype([('x0', '>i2'), ('y0', '>i2'), ('radius', '>u2'), ('color', '>u2')]),
+    0x09: np.dtype([('x0', '>i2'), ('y0', '>i2'), ('radius', '>u2'), ('color', '>u2')]),
+    0x0A: np.dtype([('x0', '>i2'), ('y0', '>i2'), ('w', '>i2'), ('h', '>i2'),
+                    ('radius', '>u2'), ('color', '>u2')]),
+    0x0B: np.dtype([('x0', '>i2'), ('y0', '>i2'), ('w', '>i2'), ('h', '>i2'),
+                    ('radius', '>u2'), ('color', '>u2')]),
+    0x0D: np.dtype([]),
+    0x0E: np.dtype([('x0', '>i2'), ('y0', '>i2'), ('w', '>i2'), ('h', '>i2')]),
+    0x0F: np.dtype([('x0', '>i2'), ('y0', '>i2'), ('w', '>i2'), ('h', '>i2'),
+                    ('logical_w', '>u2'), ('logical_h', '>u2')]),
+}
+
+# Поля, що перетворюються viewport: точки (x, y) і розміри (ширина, висота)
+_POINT_FIELDS = {
+    0x02: (('x', 'y'),),
+    0x03: (('x0', 'y0'), ('x1', 'y1')),
+    0x04: (('x0', 'y0'),),
+    0x05: (('x0', 'y0'),),
+    0x06: (('x0', 'y0'),),
+    0x07: (('x0', 'y0'),),
+    0x0A: (('x0', 'y0'),),
+    0x0B: (('x0', 'y0'),),
+    0x0E: (('x0', 'y0'),),
+}
+_SIZE_FIELDS = {
+    0x04: ('w', 'h'),
+    0x05: ('w', 'h'),
+    0x06: ('radius_x', 'radius_y'),
+    0x07: ('radius_x', 'radius_y'),
+    0x0A: ('w', 'h'),
+    0x0B: ('w', 'h'),
+    0x0E: ('w', 'h'),
+}
+# Кола після перетворення стають еліпсами
+_CIRCLE_TO_ELLIPSE = {0x08: 0x06, 0x09: 0x07}
+
+_LENGTH_PREFIX = struct.Struct('>H')
+
+# Ділянки потоку для паралельного пошуку заголовків записів: розмір
+# ділянки та кількість позицій на її початку, з яких починаються проходи
+_HEADER_BLOCK = 16384
+_HEADER_WINDOW = 32
+
+
+def _native_dtype(dtype):
+    """Та сама розкладка у рідному порядку байтів з полем index."""
+    fields = [('index', np.int64)]
+    fields += [(name, dtype.fields[name][0].newbyteorder('=')) for name in dtype.names]
+    return np.dtype(fields)
+
+
+# Довжина запису з префіксом для команд фіксованої довжини (0 - інші)
+_RECORD_LENGTHS = np.zeros(256, dtype=np.int32)
+_RECORD_LENGTHS[list(COMMAND_DTYPES)] = [EXPECTED_LENGTHS[command_id] + 3 for command_id in COMMAND_DTYPES]
+
+_NATIVE_DTYPES = {command_id: _native_dtype(dtype) for command_id, dtype in COMMAND_DTYPES.items()}
+
+_TEXT_HEADER = struct.Struct('>hhHBB')
+
+
+def _wide_dtype(names):
+    return np.dtype([('index', np.int64)] + [(name, np.int64) for name in names])
+
+
+def _scale_sizes(values, scale):
+    """Векторний відповідник viewport._scale_size."""
+    scaled = np.maximum(np.rint(values * scale), 1)
+    return np.where(values != 0, scaled, 0).astype(np.int64)
+
+
+def _decode_text(datagram, index):
+    """Те саме, що DrawTextCommand, але без логування кожного поля."""
+    x0, y0, color, font_number, length = _TEXT_HEADER.unpack_from(datagram, 1)
+    text = datagram[9:9 + length].decode('utf-8', errors='ignore')
+    return {"x0": x0, "y0": y0, "color": color, "font_number": font_number, "text": text,
+            "command_id": 0x0C, "index": index}
+
+
+def _walk_headers(data, pos, stop, last, headers, merge=()):
+    """
+    Послідовний прохід ланцюжка заголовків.
+
+    Зупиняється на першому заголовку за межею stop, у кінці даних або на
+    позиції з merge (там ланцюжок збігається з уже знайденим).
+
+    Returns:
+        int: Позиція, на якій прохід зупинився
+    """
+    append = headers.append
+    while pos < stop and pos <= last and pos not in merge:
+        append(pos)
+        pos += 2 + ((data[pos] << 8) | data[pos + 1])
+    return pos
+
+
+def _plausible_headers(array, steps, positions):
+    """Чи схожі позиції на заголовки: довжина запису відповідає команді після неї."""
+    size = len(array)
+    opcodes = array[np.minimum(positions + 2, size - 1)]
+    record_lengths = steps[positions]
+    text_lengths = array[np.minimum(positions + 10, size - 1)].astype(np.int32) + 11
+    return (_RECORD_LENGTHS[opcodes] == record_lengths) | ((opcodes == 0x0C) & (text_lengths == record_lengths))
+
+
+def _find_headers(data, array):
+    """
+    Позиції заголовків записів у потоці encode_stream().
+
+    Заголовки утворюють ланцюжок, але прохід Python по мільйону записів
+    дорожчий за решту розбору. Тому потік ділиться на ділянки по
+    _HEADER_BLOCK байтів, і з першої схожої на заголовок позиції на
+    початку кожної ділянки одночасно (векторно) йдуть спекулятивні
+    проходи. Справжній ланцюжок, увійшовши в ділянку, зазвичай одразу
+    збігається з її проходом. Якщо ні (довгий запис на межі ділянки,
+    сміття), ланцюжок продовжується послідовно до збігу або до кінця
+    ділянки, тож результат завжди той самий, що й у послідовного проходу.
+
+    Returns:
+        Tuple[np.ndarray, int]: Позиції заголовків та позиція після
+        останнього запису
+    """
+    size = len(data)
+    last = size - 2
+    if size < 4 * _HEADER_BLOCK:
+        headers = []
+        pos = _walk_headers(data, 0, size, last, headers)
+        return np.array(headers, dtype=np.int64), pos
+
+    steps = ((array[:-1].astype(np.int32) << 8) | array[1:]) + 2
+    block_starts = np.arange(0, size, _HEADER_BLOCK, dtype=np.int64)
+    block_ends = np.minimum(block_starts + _HEADER_BLOCK, size)
+
+    # З кожної ділянки - одна позиція, де схожі на заголовок і вона, і
+    # наступний за нею запис; решта позицій вікна зазвичай лежить на тому
+    # самому ланцюжку
+    candidates = (block_starts[:, None] + np.arange(_HEADER_WINDOW)).ravel()
+    candidates = candidates[candidates <= last]
+    plausible = _plausible_headers(array, steps, candidates)
+    following = candidates + steps[candidates]
+    plausible[plausible] &= _plausible_headers(array, steps, np.minimum(following[plausible], last))
+    blocks, first = np.unique(candidates[plausible] // _HEADER_BLOCK, return_index=True)
+    pos = candidates[plausible][first]
+    stop = np.minimum(block_ends[blocks], last + 1)
+
+    history = []
+    active = pos < stop
+    while active.any():
+        history.append(np.where(active, pos, -1))
+        pos += np.where(active, steps[np.minimum(pos, last)], 0)
+        active = pos < stop
+    paths = np.stack(history, axis=1) if history else np.empty((len(pos), 0), dtype=np.int64)
+    counts = (paths >= 0).sum(axis=1).tolist()
+    exits = pos.tolist()
+    walkers = dict(zip(blocks.tolist(), range(len(blocks))))
+
+    chunks = []
+    entry = 0
+    for block, end in enumerate(block_ends.tolist()):
+        if entry >= end or entry > last:
+            # Запис перекриває всю ділянку
+            continue
+        walker = walkers.get(block)
+        path = paths[walker, :counts[walker]] if walker is not None else np.empty(0, dtype=np.int64)
+        index = int(np.searchsorted(path, entry))
+        if index == len(path) or path[index] != entry:
+            headers = []
+            merge = set(path[index:].tolist())
+            entry = _walk_headers(data, entry, end, last, headers, merge)
+            chunks.append(np.array(headers, dtype=np.int64))
+            if entry not in merge:
+                continue
+            index = int(np.searchsorted(path, entry))
+        chunks.append(path[index:])
+        entry = exits[walker]
+    return np.concatenate(chunks), entry
+
+
+def encode_stream(datagrams: Iterable[bytes]) -> bytes:
+    """Запис команд у суцільний буфер з 2-байтовим префіксом довжини (big-endian)."""
+    return b''.join(_LENGTH_PREFIX.pack(len(d)) + d for d in datagrams)
+
+
+class CommandBatch:
+    """
+    Результат пакетного розбору.
+
+    Attributes:
+        arrays: ID команди -> структурований масив NumPy з полями команди
+            та полем index (позиція команди у вхідному потоці)
+        text: Список розібраних DrawText у форматі DisplayCommandParser.parse
+            з додатковим ключем 'index'
+        rejections: Кількість відхилених команд за причинами
+    """
+
+    def __init__(self, arrays, text, rejections):
+        self.arrays = arrays
+        self.text = text
+        self.rejections = rejections
+
+    def __len__(self):
+        return sum(len(a) for a in self.arrays.values()) + len(self.text)
+
+    def to_dicts(self) -> List[dict]:
+        """Розібрані команди у вихідному порядку, у форматі DisplayCommandParser.parse."""
+        items = []
+        for command_id, array in self.arrays.items():
+            names = array.dtype.names[1:]
+            for row in array.tolist():
+                result = dict(zip(names, row[1:]))
+                result['command_id'] = command_id
+                items.append((row[0], result))
+        for result in self.text:
+            result = dict(result)
+            items.append((result.pop('index'), result))
+        items.sort(key=lambda item: item[0])
+        return [result for _, result in items]
+
+    def apply_viewport(self, viewport=None):
+        """
+        Перетворення всіх координат пакета в пікселі панелі.
+
+        Для кожної команди знаходиться останній SetViewport перед нею
+        (searchsorted за індексами), і масштаб та зміщення застосовуються
+        до цілих стовпців масиву одним векторним виразом. Команди
+        SetViewport вилучаються з результату, кола стають еліпсами, поля
+        розширюються до int64, щоб масштабовані координати не переповнювались.
+
+        Args:
+            viewport: Viewport на початку пакета (за замовчуванням - без перетворення)
+
+        Returns:
+            tuple: (CommandBatch у пікселях панелі, Viewport після пакета)
+        """
+        if viewport is None:
+            viewport = Viewport()
+        changes = self.arrays.get(0x0F)
+        if (changes is None or not len(changes)) and viewport.identity:
+            return self, viewport
+
+        segments = [viewport]
+        boundaries = np.zeros(0, dtype=np.int64)
+        if changes is not None:
+            names = changes.dtype.names[1:]
+            segments += [Viewport.from_command(dict(zip(names, row[1:]))) for row in changes.tolist()]
+            boundaries = changes['index']
+        scale_x = np.array([v.scale_x for v in segments])
+        scale_y = np.array([v.scale_y for v in segments])
+        offset_x = np.array([v.offset_x for v in segments], dtype=np.float64)
+        offset_y = np.array([v.offset_y for v in segments], dtype=np.float64)
+
+        arrays = {}
+        for command_id, array in self.arrays.items():
+            if command_id == 0x0F:
+                continue
+            segment = np.searchsorted(boundaries, array['index'])
+            sx, sy = scale_x[segment], scale_y[segment]
+            ox, oy = offset_x[segment], offset_y[segment]
+
+            if command_id in _CIRCLE_TO_ELLIPSE:
+                radius = array['radius'].astype(np.float64)
+                out = np.empty(len(array), dtype=_wide_dtype(COMMAND_DTYPES[0x06].names))
+                out['index'] = array['index']
+                out['x0'] = np.rint(ox + (array['x0'] - radius) * sx)
+                out['y0'] = np.rint(oy + (array['y0'] - radius) * sy)
+                out['radius_x'] = _scale_sizes(2 * radius, sx)
+                out['radius_y'] = _scale_sizes(2 * radius, sy)
+                out['color'] = array['color']
+                command_id = _CIRCLE_TO_ELLIPSE[command_id]
+                if command_id in arrays:
+                    out = np.concatenate([arrays[command_id], out])
+                    out = out[np.argsort(out['index'], kind='stable')]
+                arrays[command_id] = out
+                continue
+
+            out = np.empty(len(array), dtype=_wide_dtype(array.dtype.names[1:]))
+            for name in array.dtype.names:
+                out[name] = array[name]
+            for x_name, y_name in _POINT_FIELDS.get(command_id, ()):
+                out[x_name] = np.rint(ox + array[x_name] * sx)
+                out[y_name] = np.rint(oy + array[y_name] * sy)
+            sizes = _SIZE_FIELDS.get(command_id)
+            if sizes:
+                out[sizes[0]] = _scale_sizes(array[sizes[0]].astype(np.float64), sx)
+                out[sizes[1]] = _scale_sizes(array[sizes[1]].astype(np.float64), sy)
+            if command_id in (0x0A, 0x0B):
+                out['radius'] = _scale_sizes(array['radius'].astype(np.float64), np.minimum(sx, sy))
+            if command_id in arrays:
+                out = np.concatenate([arrays[command_id], out])
+                out = out[np.argsort(out['index'], kind='stable')]
+            arrays[command_id] = out
+
+        text = []
+        if self.text:
+            text_segments = np.searchsorted(boundaries, [item['index'] for item in self.text]).tolist()
+            for item, segment in zip(self.text, text_segments):
+                item = dict(item)
+                item['x0'], item['y0'] = segments[segment].point(item['x0'], item['y0'])
+                text.append(item)
+
+        return CommandBatch(arrays, text, self.rejections), segments[-1]
+
+
+class BatchCommandParser:
+    """
+    Пакетний розбір записаного трафіку та синтетичних навантажень.
+
+    Усі команди фіксованої довжини розбираються одночасно: для кожного
+    ID команди байти параметрів збираються в матрицю і переглядаються
+    через big-endian dtype без поелементного розбору. DrawText має змінну
+    довжину і розбирається поштучно.
+    """
+
+    def parse_stream(self, buffer) -> CommandBatch:
+        """
+        Розбір суцільного буфера команд з префіксом довжини.
+
+        Args:
+            buffer: Байти у форматі encode_stream()
+
+        Returns:
+            CommandBatch: Розібрані команди
+        """
+        data = bytes(buffer)
+        array = np.frombuffer(data, dtype=np.uint8)
+        headers, pos = _find_headers(data, array)
+
+        truncated = 0
+        if pos != len(data):
+            # Останній запис обрізаний
+            truncated = 1
+            if pos > len(data):
+                headers = headers[:-1]
+
+        starts = headers + 2
+        lengths = (array[headers].astype(np.int64) << 8) | array[headers + 1]
+
+        batch = self._parse(array, starts, lengths)
+        if truncated:
+            batch.rejections[REJECT_BAD_LENGTH] += truncated
+        return batch
+
+    def parse_datagrams(self, datagrams: List[bytes]) -> CommandBatch:
+        """
+        Розбір списку окремих датаграм.
+
+        Args:
+            datagrams: Пакети у форматі DisplayCommandParser.parse
+
+        Returns:
+            CommandBatch: Розібрані команди
+        """
+        lengths = np.fromiter(map(len, datagrams), dtype=np.int64, count=len(datagrams))
+        starts = np.zeros(len(datagrams), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=starts[1:])
+        data = np.frombuffer(b''.join(datagrams), dtype=np.uint8)
+        return self._parse(data, starts, lengths)
+
+    def _parse(self, data, starts, lengths):
+        rejections = Counter()
+
+        nonempty = lengths > 0
+        if not nonempty.all():
+            rejections[REJECT_BAD_LENGTH] += int((~nonempty).sum())
+        opcodes = np.zeros(len(starts), dtype=np.uint8)
+        opcodes[nonempty] = data[starts[nonempty]]
+
+        known = np.isin(opcodes, list(EXPECTED_LENGTHS)) & nonempty
+        unknown = int((nonempty & ~known).sum())
+        if unknown:
+            rejections[REJECT_UNKNOWN_COMMAND] += unknown
+
+        arrays = {}
+        for command_id, dtype in COMMAND_DTYPES.items():
+            selected = opcodes == command_id
+            if not selected.any():
+                continue
+            size = EXPECTED_LENGTHS[command_id]
+            valid = selected & (lengths == size + 1)
+            bad_length = int(selected.sum() - valid.sum())
+            if bad_length:
+                rejections[REJECT_BAD_LENGTH] += bad_length
+
+            index = np.flatnonzero(valid)
+            raw = data[(starts[index] + 1)[:, None] + np.arange(size)]
+
+            offsets = NON_NEGATIVE_FIELDS.get(command_id)
+            if offsets:
+                in_range = ~np.bitwise_or.reduce(raw[:, list(offsets)] & 0x80, axis=1).astype(bool)
+                out_of_range = len(index) - int(in_range.sum())
+                if out_of_range:
+                    rejections[REJECT_OUT_OF_RANGE] += out_of_range
+                    index = index[in_range]
+                    raw = raw[in_range]
+
+            array = np.empty(len(index), dtype=_NATIVE_DTYPES[command_id])
+            array['index'] = index
+            if size:
+                fields = raw.view(dtype).reshape(len(index))
+                for name in dtype.names:
+                    array[name] = fields[name]
+            arrays[command_id] = array
+
+        # DrawText має змінну довжину, тож розбирається поштучно
+        text = []
+        for i in np.flatnonzero(opcodes == 0x0C).tolist():
+            start = int(starts[i])
+            datagram = data[start:start + int(lengths[i])].tobytes()
+            reason = validate_packet(datagram)
+            if reason is not None:
+                rejections[reason] += 1
+                continue
+            text.append(_decode_text(datagram, i))
+
+        return CommandBatch(arrays, text, rejections)
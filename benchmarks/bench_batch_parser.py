@@ -0,0 +1,81 @@
+"""
+Пропускна здатність BatchCommandParser у порівнянні з DisplayCommandParser
+на записі з мільйона команд (1% DrawText).
+
+Скалярний парсер вимірюється на вибірці з вимкненим логуванням (його
+найкращий випадок), результат екстраполюється на весь запис. Кожен
+замір - найкращий з REPEATS запусків.
+
+Запуск: python -m benchmarks.bench_batch_parser [кількість команд]
+"""
+import logging
+import random
+import struct
+import sys
+import time
+from batch_parser import BatchCommandParser, encode_stream
+from command_parser import DisplayCommandParser
+
+FIXED_TEMPLATES = [
+    (">BH", 0x01), (">BhhH", 0x02), (">BhhhhH", 0x03), (">BhhhhH", 0x04), (">BhhhhH", 0x05),
+    (">BhhhhH", 0x06), (">BhhhhH", 0x07), (">BhhHH", 0x08), (">BhhHH", 0x09),
+    (">BhhhhHH", 0x0A), (">BhhhhHH", 0x0B),
+]
+
+
+REPEATS = 3
+
+
+def best_of(repeats, function):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def make_capture(count, seed=0):
+    rng = random.Random(seed)
+    commands = []
+    for _ in range(count):
+        if rng.random() < 0.01:
+            text = b"Hello"
+            commands.append(struct.pack(">BhhHBB", 0x0C, 10, 20, 0xFFFF, 1, len(text)) + text)
+            continue
+        fmt, command_id = rng.choice(FIXED_TEMPLATES)
+        values = [rng.randint(0, 1000) for _ in range(len(fmt) - 2)]
+        commands.append(struct.pack(fmt, command_id, *values))
+    return commands
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    commands = make_capture(count)
+    stream = encode_stream(commands)
+    logging.disable(logging.CRITICAL)
+
+    # Найкращий з кількох запусків: на спільній машині окремі заміри
+    # коливаються в рази, а порівнюються саме парсери
+    scalar = DisplayCommandParser()
+    sample = commands[:50_000]
+    scalar_seconds = best_of(REPEATS, lambda: [scalar.parse(command) for command in sample])
+    scalar_rate = len(sample) / scalar_seconds
+
+    batch_parser = BatchCommandParser()
+    batch = batch_parser.parse_stream(stream)
+    stream_seconds = best_of(REPEATS, lambda: batch_parser.parse_stream(stream))
+    datagram_seconds = best_of(REPEATS, lambda: batch_parser.parse_datagrams(commands))
+
+    print(f"commands:            {count}")
+    print(f"decoded:             {len(batch)}")
+    print(f"scalar parse:        {scalar_rate:12.0f} cmd/s (est. {count / scalar_rate:.2f} s)")
+    print(f"batch parse_stream:  {count / stream_seconds:12.0f} cmd/s ({stream_seconds:.2f} s, "
+          f"{count / stream_seconds / scalar_rate:.1f}x)")
+    print(f"batch datagrams:     {count / datagram_seconds:12.0f} cmd/s ({datagram_seconds:.2f} s, "
+          f"{count / datagram_seconds / scalar_rate:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Goodput і затримка з адаптивним темпом відправлення та без нього.
+
+Для кожного режиму запускається окремий headless-емулятор, на який
+надсилається однаковий потік команд. Goodput - намальовані команди за
+секунду, втрати - надіслані, але не намальовані команди. Затримка
+оцінюється за законом Літтла: середня черга сервера / goodput.
+
+Запуск: python -m benchmarks.bench_pacing [кількість команд]
+"""
+import os
+import random
+import socket
+import struct
+import subprocess
+import sys
+import time
+from feedback import FEEDBACK_SUBSCRIBE, Feedback, PacedSender
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 12399
+
+
+def make_commands(count, seed=0):
+    rng = random.Random(seed)
+    commands = []
+    for _ in range(count):
+        x, y = rng.randint(0, 900), rng.randint(0, 650)
+        if rng.random() < 0.5:
+            commands.append(struct.pack(">BhhhhH", 0x05, x, y, 100, 100, rng.randint(0, 0xFFFF)))
+        else:
+            commands.append(struct.pack(">BhhhhH", 0x07, x, y, 120, 80, rng.randint(0, 0xFFFF)))
+    return commands
+
+
+class FeedbackLog:
+    def __init__(self):
+        self.last = None
+        self.backlogs = []
+
+    def add(self, data):
+        feedback = Feedback.parse(data)
+        if feedback is not None:
+            self.last = feedback
+            self.backlogs.append(feedback.backlog)
+
+    def drain(self, sock):
+        while True:
+            try:
+                data, _ = sock.recvfrom(64)
+            except (BlockingIOError, socket.timeout):
+                return
+            self.add(data)
+
+
+def run(commands, paced):
+    server = subprocess.Popen([sys.executable, 'headless.py', '--quiet', '--port', str(PORT)],
+                              cwd=ROOT, stderr=subprocess.DEVNULL)
+    time.sleep(1.0)
+    address = ('127.0.0.1', PORT)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    log = FeedbackLog()
+    try:
+        sock.sendto(bytes([FEEDBACK_SUBSCRIBE]), address)
+        start = time.monotonic()
+        if paced:
+            sender = PacedSender(sock, address)
+            for command in commands:
+                sender.send(command)
+                if sender.feedback is not None and sender.feedback is not log.last:
+                    log.last = sender.feedback
+                    log.backlogs.append(sender.feedback.backlog)
+        else:
+            for i, command in enumerate(commands):
+                sock.sendto(command, address)
+                if i % 64 == 0:
+                    log.drain(sock)
+
+        # Очікуємо, доки сервер не домалює чергу
+        finished = time.monotonic()
+        rendered = -1
+        while True:
+            time.sleep(0.2)
+            sock.sendto(bytes([FEEDBACK_SUBSCRIBE]), address)
+            log.drain(sock)
+            if log.last is not None and log.last.rendered == rendered:
+                break
+            if log.last is not None:
+                rendered = log.last.rendered
+                finished = time.monotonic()
+    finally:
+        sock.close()
+        server.terminate()
+        server.wait()
+
+    elapsed = finished - start
+    goodput = rendered / elapsed
+    mean_backlog = sum(log.backlogs) / max(len(log.backlogs), 1)
+    return {
+        'rendered': rendered,
+        'lost': len(commands) - rendered,
+        'goodput': goodput,
+        'mean_backlog': mean_backlog,
+        'latency_ms': mean_backlog / goodput * 1000 if goodput else float('inf'),
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    commands = make_commands(count)
+    print(f"{'mode':<10}{'rendered':>10}{'lost':>8}{'goodput/s':>12}{'backlog':>10}{'latency ms':>12}")
+    for label, paced in (("unpaced", False), ("paced", True)):
+        r = run(commands, paced)
+        print(f"{label:<10}{r['rendered']:>10}{r['lost']:>8}{r['goodput']:>12.0f}"
+              f"{r['mean_backlog']:>10.1f}{r['latency_ms']:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Порівняння власних растеризаторів з ImageDraw для малих, великих і
+майже повністю невидимих фігур. Рядки "drawer" показують DisplayDrawer,
+який сам обирає шлях через mostly_clipped() і відкидає невидимі фігури
+до виклику Pillow.
+
+Запуск: python -m benchmarks.bench_rasterizers
+"""
+import timeit
+from PIL import Image, ImageDraw
+from display_drawer import DisplayDrawer
+from rasterizer import ellipse_boxes, rounded_rectangle_boxes
+
+WIDTH, HEIGHT = 1024, 768
+CLIP = (0, 0, WIDTH - 1, HEIGHT - 1)
+
+SCENARIOS = {
+    "small": (100, 100, 140, 130),
+    "large": (-200, -100, 1200, 900),
+    "huge": (-32000, -32000, 32000, 32000),
+    "mostly offscreen": (-32000, 700, 32000, 32000),
+    "offscreen": (-32000, -32000, -100, -100),
+}
+
+
+def fill(image, boxes, color):
+    for xa, ya, xb, yb in boxes:
+        image.paste(color, (xa, ya, xb + 1, yb + 1))
+
+
+def bench(label, stmt, number):
+    seconds = min(timeit.repeat(stmt, number=number, repeat=3)) / number
+    print(f"  {label:<28} {seconds * 1e6:12.1f} us")
+
+
+def main():
+    image = Image.new('RGB', (WIDTH, HEIGHT))
+    draw = ImageDraw.Draw(image)
+    color = (255, 128, 0)
+    drawer = DisplayDrawer(WIDTH, HEIGHT)
+
+    for name, box in SCENARIOS.items():
+        number = 5 if name in ("huge", "mostly offscreen") else 50
+        print(f"{name} {box}")
+        for filled in (True, False):
+            kind = "fill" if filled else "outline"
+            if filled:
+                bench(f"pillow ellipse {kind}", lambda: draw.ellipse(box, fill=color), number)
+                bench(f"pillow rounded {kind}",
+                      lambda: draw.rounded_rectangle(box, radius=20, fill=color), number)
+            else:
+                bench(f"pillow ellipse {kind}", lambda: draw.ellipse(box, outline=color, width=2), number)
+                bench(f"pillow rounded {kind}",
+                      lambda: draw.rounded_rectangle(box, radius=20, outline=color, width=2), number)
+            bench(f"scanline ellipse {kind}",
+                  lambda: fill(image, ellipse_boxes(*box, CLIP, filled), color), number)
+            bench(f"scanline rounded {kind}",
+                  lambda: fill(image, rounded_rectangle_boxes(*box, 20, CLIP, filled), color), number)
+            x0, y0, x1, y1 = box
+            bench(f"drawer ellipse {kind}",
+                  lambda: drawer.draw_ellipse(x0, y0, x1 - x0, y1 - y0, 0xFC00, filled), number)
+            bench(f"drawer rounded {kind}",
+                  lambda: drawer.draw_rounded_rectangle(x0, y0, x1 - x0, y1 - y0, 20, 0xFC00, filled),
+                  number)
+
+    print("offscreen line and text")
+    font = drawer.font
+    bench("pillow line", lambda: draw.line([(-32000, 10), (-20000, 500)], fill=color, width=2), 500)
+    bench("drawer line", lambda: drawer.draw_line(-32000, 10, -20000, 500, 0xFC00), 500)
+    bench("pillow text", lambda: draw.text((-32000, 10), "offscreen text", fill=color, font=font), 50)
+    bench("drawer text", lambda: drawer.draw_text(-32000, 10, "offscreen text", 0xFC00), 500)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Пропускна здатність прийому та розбору залежно від кількості процесів.
+
+Кілька процесів-відправників з різних портів надсилають однаковий потік
+команд; сервер лише рахує отримані команди, тож вимірюється саме прийом,
+розбір і передача між процесами, без малювання. workers=1 - звичайний
+UDPServer в одному потоці.
+
+Запуск: python -m benchmarks.bench_sharding [команд на відправника] [відправників]
+"""
+import logging
+import multiprocessing
+import socket
+import struct
+import sys
+import threading
+import time
+from sharded_server import ShardedUDPServer
+from udp_server import UDPServer
+
+WORKER_COUNTS = (1, 2, 4)
+
+
+def blast(port, count, seed):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+    commands = [struct.pack(">BhhhhH", 0x05, (seed * 37 + i) % 900, i % 650, 100, 100, i & 0xFFFF)
+                for i in range(256)]
+    for i in range(count):
+        sock.sendto(commands[i % 256], ('127.0.0.1', port))
+        if i % 64 == 63:
+            # Невелика пауза, щоб відправники не переповнювали чергу ядра миттєво
+            time.sleep(0.0005)
+    sock.close()
+
+
+def run(workers, count, senders):
+    received = [0]
+    lock = threading.Lock()
+
+    def callback(command_data):
+        with lock:
+            received[0] += 1
+
+    if workers == 1:
+        server = UDPServer('127.0.0.1', 0, callback)
+    else:
+        server = ShardedUDPServer('127.0.0.1', 0, callback, workers)
+    server.start()
+    server.ready.wait(10)
+
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=blast, args=(server.port, count, seed)) for seed in range(senders)]
+    start = time.monotonic()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    # Чекаємо, доки сервер не розбере залишок черги
+    last, idle_since = -1, time.monotonic()
+    while time.monotonic() - idle_since < 0.3:
+        time.sleep(0.05)
+        if received[0] != last:
+            last, idle_since = received[0], time.monotonic()
+    elapsed = idle_since - start
+    server.stop()
+
+    total = count * senders
+    return received[0] / elapsed, 1 - received[0] / total
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    senders = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    logging.disable(logging.INFO)
+
+    print(f"{senders} senders x {count} commands, CPU cores: {multiprocessing.cpu_count()}")
+    print(f"{'workers':>8} {'cmd/s':>10} {'lost':>7}")
+    for workers in WORKER_COUNTS:
+        throughput, lost = run(workers, count, senders)
+        print(f"{workers:>8} {throughput:>10.0f} {lost:>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,128 @@
 import struct
 import logging
+import time
+from collections import Counter
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Очікувана довжина параметрів для кожної команди (None - змінна довжина)
+EXPECTED_LENGTHS = {
+    0x01: 2,
+    0x02: 6,
+    0x03: 10,
+    0x04: 10,
+    0x05: 10,
+    0x06: 10,
+    0x07: 10,
+    0x08: 8,
+    0x09: 8,
+    0x0A: 12,
+    0x0B: 12,
+    0x0C: None,
+    0x0D: 0,
+    0x0E: 8,
+    0x0F: 12,
+}
+
+# Мінімальна довжина параметрів для команд змінної довжини
+MIN_LENGTHS = {
+    0x0C: 8,
+}
+
+# Зміщення (у параметрах) знакових 16-бітних полів, що не можуть бути від'ємними
+NON_NEGATIVE_FIELDS = {
+    0x04: (4, 6),
+    0x05: (4, 6),
+    0x06: (4, 6),
+    0x07: (4, 6),
+    0x0A: (4, 6),
+    0x0B: (4, 6),
+    0x0E: (4, 6),
+    0x0F: (4, 6),
+}
+
+# Причини відхилення пакетів
+REJECT_UNKNOWN_COMMAND = 'unknown_command'
+REJECT_BAD_LENGTH = 'bad_length'
+REJECT_BAD_TEXT_LENGTH = 'bad_text_length'
+REJECT_OUT_OF_RANGE = 'out_of_range'
+REJECT_DECODE_ERROR = 'decode_error'
+
+
+def validate_packet(byte_array):
+    """
+    Швидка перевірка пакета до створення будь-яких об'єктів.
+
+    Перевірка виконується за сталий час: пошук у таблицях і кілька
+    порівнянь байтів, без зрізів і без логування.
+
+    Args:
+        byte_array: Непорожній пакет (ID команди + параметри)
+
+    Returns:
+        Optional[str]: Причина відхилення або None, якщо пакет коректний
+    """
+    command_id = byte_array[0]
+    if command_id not in EXPECTED_LENGTHS:
+        return REJECT_UNKNOWN_COMMAND
+
+    params_length = len(byte_array) - 1
+    expected_length = EXPECTED_LENGTHS[command_id]
+    if expected_length is not None:
+        if params_length != expected_length:
+            return REJECT_BAD_LENGTH
+    elif params_length < MIN_LENGTHS[command_id]:
+        return REJECT_BAD_LENGTH
+
+    if command_id == 0x0C and params_length < 8 + byte_array[8] - 1:
+        return REJECT_BAD_TEXT_LENGTH
+
+    for offset in NON_NEGATIVE_FIELDS.get(command_id, ()):
+        if byte_array[1 + offset] & 0x80:
+            return REJECT_OUT_OF_RANGE
+
+    return None
+
+
+class RejectionCounter:
+    """
+    Лічильники відхилених пакетів з агрегованим звітом не частіше ніж
+    раз на interval секунд, щоб потік сміття не перетворювався на потік логів.
+    """
+
+    def __init__(self, logger, interval=5.0):
+        self.logger = logger
+        self.interval = interval
+        self.counters = Counter()
+        self._pending = Counter()
+        self._window_start = time.monotonic()
+        self._last_report = None
+
+    def record(self, reason):
+        self.counters[reason] += 1
+        self._pending[reason] += 1
+        now = time.monotonic()
+        if self._last_report is None or now - self._last_report >= self.interval:
+            self.flush(now)
+
+    def flush(self, now=None):
+        if now is None:
+            now = time.monotonic()
+        if self._pending:
+            total = sum(self._pending.values())
+            self.logger.warning(f"Rejected {total} packet(s) in the last {now - self._window_start:.1f}s: "
+                                f"{dict(self._pending)}")
+            self._pending.clear()
+        self._window_start = now
+        self._last_report = now
+
+    def flush_if_due(self, now=None):
+        """Звіт про останнє вікно, коли відхилені пакети перестали надходити."""
+        if now is None:
+            now = time.monotonic()
+        if self._pending and now - self._last_report >= self.interval:
+            self.flush(now)
+
 class Command:
     def __init__(self, command_id):
         self.id = command_id
@@ -169,6 +288,38 @@ class DrawTextCommand(Command):
         }
 
 
+class PresentCommand(Command):
+    def __init__(self, params):
+        super().__init__(0x0D)
+
+    def execute(self):
+        logger.info("Present frame")
+        return {}
+
+
+class SetClipCommand(Command):
+    def __init__(self, params):
+        super().__init__(0x0E)
+        self.x0, self.y0, self.w, self.h = struct.unpack(">hhhh", params[:8])
+
+    def execute(self):
+        logger.info(f"Set clip at ({self.x0}, {self.y0}), width {self.w}, height {self.h}")
+        return {"x0": self.x0, "y0": self.y0, "w": self.w, "h": self.h}
+
+
+class SetViewportCommand(Command):
+    def __init__(self, params):
+        super().__init__(0x0F)
+        self.x0, self.y0, self.w, self.h = struct.unpack(">hhhh", params[:8])
+        self.logical_w, self.logical_h = struct.unpack(">HH", params[8:12])
+
+    def execute(self):
+        logger.info(f"Set viewport {self.logical_w}x{self.logical_h} onto ({self.x0}, {self.y0}), "
+                    f"width {self.w}, height {self.h}")
+        return {"x0": self.x0, "y0": self.y0, "w": self.w, "h": self.h,
+                "logical_w": self.logical_w, "logical_h": self.logical_h}
+
+
 class TextCommandParser:
     def __init__(self):
         self.logger = logging.getLogger('text_command_parser')
@@ -228,45 +379,33 @@ class DisplayCommandParser:
             0x09: FillCircleCommand,
             0x0A: DrawRoundedRectangleCommand,
             0x0B: FillRoundedRectangleCommand,
-            0x0C: DrawTextCommand
+            0x0C: DrawTextCommand,
+            0x0D: PresentCommand,
+            0x0E: SetClipCommand,
+            0x0F: SetViewportCommand
         }
 
-        self.expected_lengths = {
-            0x01: 2,   
-            0x02: 6,   
-            0x03: 10,  
-            0x04: 10,  
-            0x05: 10,  
-            0x06: 10,  
-            0x07: 10, 
-            0x08: 8,   
-            0x09: 8,   
-            0x0A: 12,  
-            0x0B: 12, 
-            0x0C: None, 
-        }
+        self.expected_lengths = dict(EXPECTED_LENGTHS)
+        self.rejections = RejectionCounter(self.logger)
 
     def parse(self, byte_array):
-        self.logger.info(f"Received byte array: {byte_array.hex()}")
         if not byte_array:
-            raise ValueError("Byte array is empty")
-            
+            self.rejections.record(REJECT_BAD_LENGTH)
+            return None
+
+        reason = validate_packet(byte_array)
+        if reason is not None:
+            self.rejections.record(reason)
+            return None
+
+        self.logger.info(f"Received byte array: {byte_array.hex()}")
         command_id = byte_array[0]
         params = byte_array[1:]
         self.logger.info(f"Command ID: {command_id}, Params: {params.hex()}")
 
-        if command_id not in self.commands:
-            self.logger.warning(f"Unknown command ID: {command_id}")
-            return None
-
         if command_id == 0x0C:
             if not self.text_parser.validate_and_parse(params):
                 return None
-        else:
-            expected_length = self.expected_lengths.get(command_id)
-            if expected_length is not None and len(params) != expected_length:
-                self.logger.error(f"Invalid number of parameters for command ID {command_id}: expected {expected_length}, got {len(params)}")
-                return None
 
         command_class = self.commands[command_id]
         try:
@@ -275,5 +414,6 @@ class DisplayCommandParser:
             result['command_id'] = command_id
             return result
         except Exception as e:
-            self.logger.error(f"Error executing command {command_id}: {str(e)}", exc_info=True)
-            return None
\ No newline at end of file
+            self.rejections.record(REJECT_DECODE_ERROR)
+            self.logger.debug(f"Error executing command {command_id}: {str(e)}", exc_info=True)
+            return None
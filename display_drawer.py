@@ -0,0 +1,366 @@
+from frame_hash import FrameHasher
+from rasterizer import ellipse_boxes, rounded_rectangle_boxes, mostly_clipped
+from viewport import Viewport
+
+# Запас навколо відрізка товщиною 2 пікселі для перевірки видимості
+LINE_MARGIN = 2
+
+
+class DisplayDrawer:
+    def __init__(self, width, height, double_buffered=False):
+        # Pillow імпортується лише при створенні першого DisplayDrawer
+        from PIL import Image, ImageDraw
+
+        self.width = width
+        self.height = height
+        self.double_buffered = double_buffered
+        # image - буфер, у який малюють команди; front_image - показаний кадр
+        self.image = Image.new('RGB', (width, height), 'black')
+        self.draw = ImageDraw.Draw(self.image)
+        # Хеші вмісту кожного буфера; малювання позначає змінені плитки
+        self._hasher = FrameHasher(width, height)
+        if double_buffered:
+            self.front_image = Image.new('RGB', (width, height), 'black')
+            self._front_draw = ImageDraw.Draw(self.front_image)
+            self._front_hasher = FrameHasher(width, height)
+        else:
+            self.front_image = self.image
+            self._front_draw = self.draw
+            self._front_hasher = self._hasher
+        self._font = None
+        self._line_height = None
+        # Область відсікання (включно); задається командою SetClip (0x0E)
+        self.surface = (0, 0, width - 1, height - 1)
+        self.clip = self.surface
+        # Перетворення логічних координат; задається командою SetViewport (0x0F)
+        self.viewport = Viewport()
+
+    @property
+    def font(self):
+        # Шрифт завантажується при першому виведенні тексту
+        if self._font is None:
+            from PIL import ImageFont
+
+            self._font = ImageFont.load_default()
+        return self._font
+
+    def rgb565_to_rgb888(self, color565):
+        r = (color565 >> 11) & 0x1F
+        g = (color565 >> 5) & 0x3F
+        b = color565 & 0x1F
+        
+        r = (r * 255) // 31
+        g = (g * 255) // 63
+        b = (b * 255) // 31
+        
+        return (r, g, b)
+
+    def clear_display(self):
+        self.draw.rectangle([0, 0, self.width, self.height], fill='black')
+        self._hasher.mark_cleared()
+
+    def set_clip(self, x0, y0, w, h):
+        """
+        Обмеження малювання прямокутником w x h пікселів панелі.
+
+        Нульові ширина і висота одночасно скидають відсікання до всієї
+        поверхні; порожній перетин з поверхнею відсікає все.
+        """
+        if w == 0 and h == 0:
+            self.clip = self.surface
+            return
+        sx0, sy0, sx1, sy1 = self.surface
+        self.clip = (max(x0, sx0), max(y0, sy0), min(x0 + w - 1, sx1), min(y0 + h - 1, sy1))
+
+    def _visible_region(self, x0, y0, x1, y1):
+        """Перетин рамки фігури з областю відсікання або None, якщо фігура невидима."""
+        cx0, cy0, cx1, cy1 = self.clip
+        region = (max(x0, cx0), max(y0, cy0), min(x1, cx1), min(y1, cy1))
+        if region[0] > region[2] or region[1] > region[3]:
+            return None
+        return region
+
+    def _paint(self, box, color, paint):
+        """
+        Малювання фігури Pillow з урахуванням області відсікання.
+
+        Pillow сам відсікає малювання межами зображення, тож фігура
+        малюється напряму, якщо відсікання не задане або фігура повністю
+        в ньому. Інакше фігура малюється в маску розміром з видиму частину,
+        і колір накладається через маску.
+
+        Args:
+            box: Рамка фігури (включно)
+            color: Колір RGB888
+            paint: Функція (draw, dx, dy, fill), що малює фігуру зі зсувом
+        """
+        region = self._visible_region(*box)
+        if region is None:
+            return
+        self._hasher.mark_dirty(*region)
+        if self.clip == self.surface or region == tuple(box):
+            paint(self.draw, 0, 0, color)
+            return
+
+        from PIL import Image, ImageDraw
+
+        xa, ya, xb, yb = region
+        mask = Image.new('L', (xb - xa + 1, yb - ya + 1))
+        paint(ImageDraw.Draw(mask), -xa, -ya, 255)
+        self.image.paste(color, (xa, ya, xb + 1, yb + 1), mask)
+
+    def draw_pixel(self, x, y, color):
+        # Найчастіша команда: перевірка меж без _visible_region і кортежів
+        cx0, cy0, cx1, cy1 = self.clip
+        if not (cx0 <= x <= cx1 and cy0 <= y <= cy1):
+            return
+        self._hasher.mark_pixel(x, y)
+        color = self.rgb565_to_rgb888(color)
+        self.draw.point((x, y), fill=color)
+
+    def draw_line(self, x0, y0, x1, y1, color):
+        color = self.rgb565_to_rgb888(color)
+        box = (min(x0, x1) - LINE_MARGIN, min(y0, y1) - LINE_MARGIN,
+               max(x0, x1) + LINE_MARGIN, max(y0, y1) + LINE_MARGIN)
+
+        def paint(draw, dx, dy, fill):
+            draw.line([(x0 + dx, y0 + dy), (x1 + dx, y1 + dy)], fill=fill, width=2)
+
+        self._paint(box, color, paint)
+
+    def draw_rectangle(self, x0, y0, w, h, color, filled=False):
+        color = self.rgb565_to_rgb888(color)
+        x1, y1 = x0 + w, y0 + h
+        if filled:
+            # Заливка прямокутника відсікається простим перетином
+            region = self._visible_region(x0, y0, x1, y1)
+            if region is not None:
+                self._hasher.mark_dirty(*region)
+                self.draw.rectangle(region, fill=color)
+            return
+
+        def paint(draw, dx, dy, fill):
+            draw.rectangle([x0 + dx, y0 + dy, x1 + dx, y1 + dy], outline=fill, width=2)
+
+        self._paint((x0, y0, x1, y1), color, paint)
+
+    def _fill_boxes(self, boxes, color):
+        # Вироджений контур Pillow виходить за рамку фігури, тож змінені
+        # плитки визначаються за самими прямокутниками
+        for box in boxes:
+            self._hasher.mark_dirty(*box)
+            self.draw.rectangle(box, fill=color)
+
+    def draw_circle(self, x0, y0, radius, color, filled=False):
+        self.draw_ellipse(x0 - radius, y0 - radius, 2 * radius, 2 * radius, color, filled)
+
+    def draw_ellipse(self, x0, y0, w, h, color, filled=False):
+        x1, y1 = x0 + w, y0 + h
+        region = self._visible_region(x0, y0, x1, y1)
+        if region is None:
+            return
+        color = self.rgb565_to_rgb888(color)
+        if mostly_clipped(x0, y0, x1, y1, self.clip):
+            self._fill_boxes(ellipse_boxes(x0, y0, x1, y1, self.clip, filled), color)
+            return
+
+        def paint(draw, dx, dy, fill):
+            if filled:
+                draw.ellipse([x0 + dx, y0 + dy, x1 + dx, y1 + dy], fill=fill)
+            else:
+                draw.ellipse([x0 + dx, y0 + dy, x1 + dx, y1 + dy], outline=fill, width=2)
+
+        self._paint((x0, y0, x1, y1), color, paint)
+
+    def draw_rounded_rectangle(self, x0, y0, w, h, radius, color, filled=False):
+        x1, y1 = x0 + w, y0 + h
+        region = self._visible_region(x0, y0, x1, y1)
+        if region is None:
+            return
+        color = self.rgb565_to_rgb888(color)
+        if mostly_clipped(x0, y0, x1, y1, self.clip):
+            self._fill_boxes(rounded_rectangle_boxes(x0, y0, x1, y1, radius, self.clip, filled), color)
+            return
+
+        def paint(draw, dx, dy, fill):
+            box = [x0 + dx, y0 + dy, x1 + dx, y1 + dy]
+            if filled:
+                draw.rounded_rectangle(box, radius=radius, fill=fill)
+            else:
+                draw.rounded_rectangle(box, radius=radius, outline=fill, width=2)
+
+        self._paint((x0, y0, x1, y1), color, paint)
+
+    def _text_box(self, x0, y0, text):
+        """
+        Рамка тексту із запасом.
+
+        Точна рамка (font.getbbox) коштує майже стільки ж, скільки виведення
+        тексту, тож для відсікання достатньо оцінки за висотою рядка:
+        символ не ширший за дві висоти рядка.
+        """
+        if self._line_height is None:
+            self._line_height = max(self.font.getbbox("Ag")[3], 1)
+        em = self._line_height
+        lines = text.split('\n')
+        longest = max(len(line) for line in lines)
+        return (x0 - em, y0 - em, x0 + 2 * em * (longest + 1), y0 + 2 * em * (len(lines) + 1))
+
+    def draw_text(self, x0, y0, text, color):
+        color = self.rgb565_to_rgb888(color)
+        box = self._text_box(x0, y0, text)
+
+        def paint(draw, dx, dy, fill):
+            draw.text((x0 + dx, y0 + dy), text, fill=fill, font=self.font)
+
+        self._paint(box, color, paint)
+
+    def render(self, command_data):
+        """
+        Виконання розібраної команди.
+
+        Координати перетворюються поточним viewport один раз тут, тож
+        методи draw_* працюють у пікселях панелі.
+
+        Args:
+            command_data: Результат DisplayCommandParser.parse
+
+        Returns:
+            bool: True, якщо видимий кадр змінився і його треба показати
+        """
+        command_id = command_data['command_id']
+        viewport = self.viewport
+        
+        if command_id == 0x01:  # Clear Display
+            self.clear_display()
+            
+        elif command_id == 0x02:  # Draw Pixel
+            x, y = command_data['x'], command_data['y']
+            if not viewport.identity:
+                x, y = viewport.point(x, y)
+            color = command_data['color']
+            self.draw_pixel(x, y, color)
+            
+        elif command_id == 0x03:  # Draw Line
+            x0, y0 = viewport.point(command_data['x0'], command_data['y0'])
+            x1, y1 = viewport.point(command_data['x1'], command_data['y1'])
+            color = command_data['color']
+            self.draw_line(x0, y0, x1, y1, color)
+            
+        elif command_id == 0x04:  # Draw Rectangle
+            x0, y0 = viewport.point(command_data['x0'], command_data['y0'])
+            w, h = viewport.size(command_data['w'], command_data['h'])
+            color = command_data['color']
+            self.draw_rectangle(x0, y0, w, h, color)
+            
+        elif command_id == 0x05:  # Fill Rectangle
+            x0, y0 = viewport.point(command_data['x0'], command_data['y0'])
+            w, h = viewport.size(command_data['w'], command_data['h'])
+            color = command_data['color']
+            self.draw_rectangle(x0, y0, w, h, color, filled=True)
+
+        elif command_id in (0x06, 0x07):  # DrawEllipse, FillEllipse
+            x0, y0 = viewport.point(command_data['x0'], command_data['y0'])
+            radius_x, radius_y = viewport.size(command_data['radius_x'], command_data['radius_y'])
+            color = command_data['color']
+            filled = command_id == 0x07
+            self.draw_ellipse(x0, y0, radius_x, radius_y, color, filled)
+
+        elif command_id in (0x08, 0x09):  # Draw/Fill Circle
+            # Коло як еліпс: при різних масштабах осей воно розтягується
+            x0, y0, w, h = viewport.circle_box(command_data['x0'], command_data['y0'], command_data['radius'])
+            color = command_data['color']
+            self.draw_ellipse(x0, y0, w, h, color, filled=(command_id == 0x09))
+
+        elif command_id in (0x0A, 0x0B):  # DrawRoundedRectangle, FillRoundedRectangle
+            x0, y0 = viewport.point(command_data['x0'], command_data['y0'])
+            w, h = viewport.size(command_data['w'], command_data['h'])
+            radius = viewport.radius(command_data['radius'])
+            color = command_data['color']
+            filled = command_id == 0x0B
+            self.draw_rounded_rectangle(x0, y0, w, h, radius, color, filled)
+
+        elif command_id == 0x0C:  # Draw Text
+            # Масштабується лише позиція тексту, розмір шрифту незмінний
+            x0, y0 = viewport.point(command_data['x0'], command_data['y0'])
+            text = command_data['text']
+            color = command_data['color']
+            self.draw_text(x0, y0, text, color)
+
+        elif command_id == 0x0D:  # Present
+            self.swap_buffers()
+            return True
+
+        elif command_id == 0x0E:  # Set Clip
+            x0, y0 = viewport.point(command_data['x0'], command_data['y0'])
+            w, h = viewport.size(command_data['w'], command_data['h'])
+            self.set_clip(x0, y0, w, h)
+            return False
+
+        elif command_id == 0x0F:  # Set Viewport
+            self.viewport = Viewport.from_command(command_data)
+            return False
+
+        # У режимі подвійної буферизації кадр показується лише командою Present
+        return not self.double_buffered
+
+    def render_batch(self, batch):
+        """
+        Виконання пакета з BatchCommandParser.
+
+        Viewport застосовується до всього пакета одним векторним
+        перетворенням, після чого команди малюються вже в пікселях панелі.
+
+        Args:
+            batch: CommandBatch
+
+        Returns:
+            bool: True, якщо видимий кадр змінився і його треба показати
+        """
+        transformed, viewport = batch.apply_viewport(self.viewport)
+        self.viewport = Viewport()
+        changed = False
+        try:
+            for command_data in transformed.to_dicts():
+                if self.render(command_data):
+                    changed = True
+        finally:
+            self.viewport = viewport
+        return changed
+
+    def swap_buffers(self):
+        """
+        Обмін переднього і заднього буферів без копіювання.
+
+        Після обміну задній буфер містить кадр, показаний перед поточним,
+        тож відправник має перемалювати кадр повністю.
+        """
+        if self.double_buffered:
+            self.image, self.front_image = self.front_image, self.image
+            self.draw, self._front_draw = self._front_draw, self.draw
+            self._hasher, self._front_hasher = self._front_hasher, self._hasher
+
+    def get_image(self):
+        return self.front_image
+
+    def frame_hash(self):
+        """
+        Хеш вмісту показаного кадру.
+
+        Перераховуються лише плитки, змінені з попереднього виклику, тож
+        порівняння кадрів коштує пропорційно зміненій площі.
+
+        Returns:
+            bytes: 8-байтовий хеш; однаковий вміст дає однаковий хеш
+        """
+        return self._front_hasher.update(self.front_image)
+
+    def tile_hashes(self):
+        """
+        Хеші плиток показаного кадру.
+
+        Returns:
+            List[bytes]: Хеші плиток TILE_SIZE x TILE_SIZE по рядках
+        """
+        self._front_hasher.update(self.front_image)
+        return list(self._front_hasher.tiles)
@@ -1,81 +1,21 @@
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageDraw, ImageTk, ImageFont
+from PIL import ImageTk
 import logging
+import argparse
 from udp_server import UDPServer
 from command_parser import DisplayCommandParser
-
-
-class DisplayDrawer:
-    def __init__(self, width, height):
-        self.width = width
-        self.height = height
-        self.image = Image.new('RGB', (width, height), 'black')
-        self.draw = ImageDraw.Draw(self.image)
-        self.font = ImageFont.load_default()
-
-    def rgb565_to_rgb888(self, color565):
-        r = (color565 >> 11) & 0x1F
-        g = (color565 >> 5) & 0x3F
-        b = color565 & 0x1F
-        
-        r = (r * 255) // 31
-        g = (g * 255) // 63
-        b = (b * 255) // 31
-        
-        return (r, g, b)
-
-    def clear_display(self):
-        self.draw.rectangle([0, 0, self.width, self.height], fill='black')
-
-    def draw_pixel(self, x, y, color):
-        color = self.rgb565_to_rgb888(color)
-        self.draw.point((x, y), fill=color)
-
-    def draw_line(self, x0, y0, x1, y1, color):
-        color = self.rgb565_to_rgb888(color)
-        self.draw.line([(x0, y0), (x1, y1)], fill=color, width=2)
-
-    def draw_rectangle(self, x0, y0, w, h, color, filled=False):
-        color = self.rgb565_to_rgb888(color)
-        if filled:
-            self.draw.rectangle([x0, y0, x0 + w, y0 + h], fill=color)
-        else:
-            self.draw.rectangle([x0, y0, x0 + w, y0 + h], outline=color, width=2)
-
-    def draw_circle(self, x0, y0, radius, color, filled=False):
-        color = self.rgb565_to_rgb888(color)
-        if filled:
-            self.draw.ellipse([x0 - radius, y0 - radius, x0 + radius, y0 + radius], fill=color)
-        else:
-            self.draw.ellipse([x0 - radius, y0 - radius, x0 + radius, y0 + radius], outline=color, width=2)
-
-    def draw_ellipse(self, x0, y0, w, h, color, filled=False):
-        color = self.rgb565_to_rgb888(color)
-        if filled:
-            self.draw.ellipse([x0, y0, x0 + w, y0 + h], fill=color)
-        else:
-            self.draw.ellipse([x0, y0, x0 + w, y0 + h], outline=color, width=2)
-
-    def draw_rounded_rectangle(self, x0, y0, w, h, radius, color, filled=False):
-        color = self.rgb565_to_rgb888(color)
-        if filled:
-            self.draw.rounded_rectangle([x0, y0, x0 + w, y0 + h], radius=radius, fill=color)
-        else:
-            self.draw.rounded_rectangle([x0, y0, x0 + w, y0 + h], radius=radius, outline=color, width=2)
-
-    def draw_text(self, x0, y0, text, color):
-        color = self.rgb565_to_rgb888(color)
-        self.draw.text((x0, y0), text, fill=color, font=self.font)
-
-    def get_image(self):
-        return self.image
+from display_drawer import DisplayDrawer
 
 
 class DisplayEmulator:
-    def __init__(self, width=1024, height=768):
+    def __init__(self, width=1024, height=768, shared_framebuffer=None, double_buffered=False):
         self.width = width
         self.height = height
+        self.double_buffered = double_buffered
+
+        # Спільний кадровий буфер для зовнішніх процесів (опціонально)
+        self.shared_framebuffer = shared_framebuffer
 
         # Налаштування UDP сервера
         self.HOST = '127.0.0.1'
@@ -95,7 +35,8 @@ class DisplayEmulator:
         self.root.minsize(width + 200, height)
         
         # Ініціалізація DisplayDrawer
-        self.display_drawer = DisplayDrawer(width, height)
+        self.display_drawer = DisplayDrawer(width, height, double_buffered)
+        self._displayed_hash = None
 
         # Обробник закриття вікна
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -120,7 +61,12 @@ class DisplayEmulator:
             "Fill Circle ": b'\x09\x00\x64\x00\x64\x00\x32\x0F\xFF',
             "Draw Rounded Rectangle": b'\x0A\x00\x32\x00\x32\x00\x64\x00\x64\x00\x0A\x0F\xFF',
             "Fill Rounded Rectangle": b'\x0B\x00\x32\x00\x32\x00\x64\x00\x64\x00\x0A\x0F\xFF',
-            "Draw Text": b'\x0C\x00\x32\x00\x32\xFF\xFF\x0C\x05Hello'
+            "Draw Text": b'\x0C\x00\x32\x00\x32\xFF\xFF\x0C\x05Hello',
+            "Present": b'\x0D',
+            "Set Clip": b'\x0E\x00\x32\x00\x32\x01\x00\x00\xC8',
+            "Reset Clip": b'\x0E\x00\x00\x00\x00\x00\x00\x00\x00',
+            "Set Viewport 2x": b'\x0F\x00\x00\x00\x00\x04\x00\x03\x00\x02\x00\x01\x80',
+            "Reset Viewport": b'\x0F\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
         }
 
         # Створення віджетів
@@ -198,87 +144,44 @@ class DisplayEmulator:
             
                 if result:
                     logging.info(f"Parsed command: {result}")
-                    # Виконуємо команду
+                    # Виконуємо команду (дисплей оновлюється в process_command)
                     self.process_command(result)
-                    # Оновлюємо дисплей
-                    self.update_display()
                 else:
                     logging.error(f"Failed to parse command: {selected_command}")
             except Exception as e:
                 logging.error(f"Error executing command {selected_command}: {str(e)}")
 
     def process_command(self, command_data):
-        command_id = command_data['command_id']
-        
-        if command_id == 0x01:  # Clear Display
-            self.display_drawer.clear_display()
-            
-        elif command_id == 0x02:  # Draw Pixel
-            x, y = command_data['x'], command_data['y']
-            color = command_data['color']
-            self.display_drawer.draw_pixel(x, y, color)
-            
-        elif command_id == 0x03:  # Draw Line
-            x0, y0 = command_data['x0'], command_data['y0']
-            x1, y1 = command_data['x1'], command_data['y1']
-            color = command_data['color']
-            self.display_drawer.draw_line(x0, y0, x1, y1, color)
-            
-        elif command_id == 0x04:  # Draw Rectangle
-            x0, y0 = command_data['x0'], command_data['y0']
-            w, h = command_data['w'], command_data['h']
-            color = command_data['color']
-            self.display_drawer.draw_rectangle(x0, y0, w, h, color)
-            
-        elif command_id == 0x05:  # Fill Rectangle
-            x0, y0 = command_data['x0'], command_data['y0']
-            w, h = command_data['w'], command_data['h']
-            color = command_data['color']
-            self.display_drawer.draw_rectangle(x0, y0, w, h, color, filled=True)
-
-        elif command_id in (0x06, 0x07):  # DrawEllipse, FillEllipse
-            x0, y0 = command_data['x0'], command_data['y0']
-            radius_x, radius_y = command_data['radius_x'], command_data['radius_y']
-            color = command_data['color']
-            filled = command_id == 0x07
-            self.display_drawer.draw_ellipse(x0, y0, radius_x, radius_y, color, filled)
-
-        elif command_id in (0x08, 0x09):  # Draw/Fill Circle
-            x0, y0 = command_data['x0'], command_data['y0']
-            radius = command_data['radius']
-            color = command_data['color']
-            self.display_drawer.draw_circle(x0, y0, radius, color, filled=(command_id == 0x09))
-
-        elif command_id in (0x0A, 0x0B):  # DrawRoundedRectangle, FillRoundedRectangle
-            x0, y0 = command_data['x0'], command_data['y0']
-            w, h = command_data['w'], command_data['h']
-            radius = command_data['radius']
-            color = command_data['color']
-            filled = command_id == 0x0B
-            self.display_drawer.draw_rounded_rectangle(x0, y0, w, h, radius, color, filled)
-
-        elif command_id == 0x0C:  # Draw Text
-            x0, y0 = command_data['x0'], command_data['y0']
-            text = command_data['text']
-            color = command_data['color']
-            self.display_drawer.draw_text(x0, y0, text, color)
-
-        self.update_display()
+        if self.display_drawer.render(command_data):
+            self.update_display()
+        self.udp_server.command_done(command_data)
 
     def clear_display(self):
         self.display_drawer.clear_display()
+        self.display_drawer.swap_buffers()
         self.update_display()
 
     def update_display(self):
+        # Кадр з тим самим вмістом не перемальовується і не публікується
+        frame_hash = self.display_drawer.frame_hash()
+        if frame_hash == self._displayed_hash:
+            return
+        self._displayed_hash = frame_hash
         image = self.display_drawer.get_image()
         image_tk = ImageTk.PhotoImage(image)
         self.canvas.delete("all")
         self.canvas.create_image(0, 0, anchor="nw", image=image_tk)
         self.canvas._image = image_tk
+        if self.shared_framebuffer is not None:
+            self.shared_framebuffer.publish(image)
 
     def on_closing(self):
         """Обробник закриття вікна"""
         self.udp_server.stop()  
+        if self.shared_framebuffer is not None:
+            self.shared_framebuffer.close()
+            if self.shared_framebuffer.name is not None:
+                self.shared_framebuffer.unlink()
         self.root.quit()
         self.root.destroy()
 
@@ -293,10 +196,25 @@ class DisplayEmulator:
             self.running = False
 
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Display Emulator")
+    arg_parser.add_argument('--framebuffer', metavar='PATH',
+                            help="publish frames to a memory-mapped file")
+    arg_parser.add_argument('--shm', metavar='NAME',
+                            help="publish frames to a POSIX shared memory segment")
+    arg_parser.add_argument('--double-buffer', action='store_true',
+                            help="draw into a back buffer and show it only on Present (0x0D)")
+    args = arg_parser.parse_args()
+
     try:
         logging.basicConfig(level=logging.INFO, 
                           format='%(asctime)s - %(levelname)s - %(message)s')
-        emulator = DisplayEmulator()
+        shared_framebuffer = None
+        if args.framebuffer or args.shm:
+            from shared_framebuffer import SharedFramebuffer
+            shared_framebuffer = SharedFramebuffer(1024, 768, path=args.framebuffer, name=args.shm)
+            logging.info(f"Publishing frames to {args.framebuffer or shared_framebuffer.name}")
+        emulator = DisplayEmulator(shared_framebuffer=shared_framebuffer,
+                                   double_buffered=args.double_buffer)
         emulator.run()
     except Exception as e:
         logging.error(f"Fatal error: {str(e)}")
\ No newline at end of file
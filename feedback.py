@@ -0,0 +1,188 @@
+import os
+import socket
+import struct
+import time
+from typing import Optional, Tuple
+
+# Підписка на зворотний зв'язок: один байт від відправника. Пакети
+# зворотного зв'язку надсилаються лише підписникам, що з попередньої
+# розсилки надіслали хоча б одну команду, тож на підписку з підробленої
+# адреси сервер не відповідає потоком пакетів.
+FEEDBACK_SUBSCRIBE = 0xA7
+
+# Зворотний зв'язок від сервера: magic, оцінка черги в командах, команди в
+# очікуванні малювання, байти в черзі сокета, втрати ядра, відхилені пакети,
+# отримані пакети, намальовані команди, затримка малювання (мкс)
+FEEDBACK_MAGIC = 0xA8
+FEEDBACK = struct.Struct('>BIIIIIIII')
+
+UNKNOWN = 0xFFFFFFFF
+
+SUBSCRIPTION_TTL = 5.0
+FEEDBACK_INTERVAL = 0.02
+MAX_SUBSCRIBERS = 64
+
+# Приблизні накладні витрати ядра Linux на одну датаграму в черзі сокета
+# (rx_queue у /proc/net/udp рахує truesize буферів, а не корисні байти)
+SKB_OVERHEAD = 768
+
+
+def read_socket_stats(sock: socket.socket) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Розмір черги прийому та лічильник втрат UDP-сокета з /proc/net/udp.
+
+    Returns:
+        Tuple[Optional[int], Optional[int]]: (байти в черзі, втрачені датаграми)
+        або (None, None), якщо дані недоступні (не Linux)
+    """
+    try:
+        inode = str(os.fstat(sock.fileno()).st_ino)
+        with open('/proc/net/udp') as f:
+            next(f)
+            for line in f:
+                fields = line.split()
+                if fields[9] == inode:
+                    rx_queue = int(fields[4].split(':')[1], 16)
+                    return rx_queue, int(fields[12])
+    except (OSError, IndexError, ValueError, StopIteration):
+        pass
+    return None, None
+
+
+class Feedback:
+    """Розібраний пакет зворотного зв'язку."""
+
+    def __init__(self, backlog, pending_render, socket_backlog, kernel_drops,
+                 rejected, received, rendered, render_lag_us):
+        self.backlog = backlog
+        self.pending_render = pending_render
+        self.socket_backlog = socket_backlog
+        self.kernel_drops = None if kernel_drops == UNKNOWN else kernel_drops
+        self.rejected = rejected
+        self.received = received
+        self.rendered = rendered
+        self.render_lag = render_lag_us / 1e6
+
+    @classmethod
+    def parse(cls, data: bytes) -> Optional['Feedback']:
+        if len(data) != FEEDBACK.size or data[0] != FEEDBACK_MAGIC:
+            return None
+        return cls(*FEEDBACK.unpack(data)[1:])
+
+
+class ServerStats:
+    """
+    Лічильники сервера для зворотного зв'язку з відправниками.
+
+    Споживач команд викликає command_done() після малювання; поки він
+    цього не робить, черга малювання вважається порожньою.
+    """
+
+    def __init__(self):
+        self.received = 0
+        self.received_bytes = 0
+        self.dispatched = 0
+        self.rendered = 0
+        self.render_lag = 0.0
+        self.tracking = False
+
+    def on_received(self, size):
+        self.received += 1
+        self.received_bytes += size
+
+    def command_done(self, received_at):
+        self.tracking = True
+        self.rendered += 1
+        lag = time.monotonic() - received_at
+        # Експоненційне згладжування, щоб одиничні сплески не розгойдували відправників
+        self.render_lag += 0.2 * (lag - self.render_lag)
+
+    @property
+    def pending_render(self):
+        return max(self.dispatched - self.rendered, 0) if self.tracking else 0
+
+    def encode(self, sock, rejected):
+        socket_backlog, kernel_drops = read_socket_stats(sock)
+        backlog = self.pending_render
+        if socket_backlog and self.received:
+            # Байти в черзі сокета переводимо в команди за середнім розміром датаграми
+            average_size = SKB_OVERHEAD + self.received_bytes // self.received
+            backlog += socket_backlog // average_size
+        return FEEDBACK.pack(
+            FEEDBACK_MAGIC,
+            min(backlog, UNKNOWN - 1),
+            min(self.pending_render, UNKNOWN - 1),
+            socket_backlog or 0,
+            UNKNOWN if kernel_drops is None else kernel_drops & 0xFFFFFFFF,
+            rejected & 0xFFFFFFFF,
+            self.received & 0xFFFFFFFF,
+            self.rendered & 0xFFFFFFFF,
+            min(int(self.render_lag * 1e6), UNKNOWN - 1),
+        )
+
+
+class PacedSender:
+    """
+    Відправник, що підлаштовує темп під зворотний зв'язок сервера.
+
+    Пакети розподіляються рівномірно з поточним темпом rate (команд/с).
+    Якщо черга сервера більша за target_backlog або ядро втрачає
+    датаграми, темп зменшується мультиплікативно, інакше плавно зростає,
+    утримуючи чергу поблизу цілі.
+    """
+
+    def __init__(self, sock: socket.socket, address, rate: float = 2000.0, target_backlog: int = 32,
+                 min_rate: float = 100.0, max_rate: float = 200000.0, gain: float = 0.1):
+        self.sock = sock
+        self.address = address
+        self.rate = rate
+        self.target_backlog = target_backlog
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.gain = gain
+        self.feedback = None
+        self.sent = 0
+        self._next_send = time.monotonic()
+        self._last_subscribe = None
+        self.sock.setblocking(False)
+
+    def send(self, datagram: bytes):
+        now = time.monotonic()
+        if self._last_subscribe is None or now - self._last_subscribe >= SUBSCRIPTION_TTL / 2:
+            self.sock.sendto(bytes([FEEDBACK_SUBSCRIBE]), self.address)
+            self._last_subscribe = now
+        self.poll_feedback()
+
+        now = time.monotonic()
+        if now < self._next_send:
+            time.sleep(self._next_send - now)
+            now = self._next_send
+        self.sock.sendto(datagram, self.address)
+        self.sent += 1
+        # Не накопичуємо «кредит» більше ніж на кілька пакетів після паузи
+        self._next_send = max(self._next_send, now - 4 / self.rate) + 1 / self.rate
+
+    def poll_feedback(self):
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(64)
+            except (BlockingIOError, socket.timeout):
+                return
+            feedback = Feedback.parse(data)
+            if feedback is not None:
+                self._adapt(feedback)
+
+    def _adapt(self, feedback: Feedback):
+        previous = self.feedback
+        self.feedback = feedback
+        drops = (previous is not None and feedback.kernel_drops is not None
+                 and previous.kernel_drops is not None
+                 and feedback.kernel_drops > previous.kernel_drops)
+
+        if drops:
+            self.rate *= 0.5
+        elif feedback.backlog > self.target_backlog:
+            self.rate *= max(0.5, 1 - self.gain * (feedback.backlog / self.target_backlog - 1))
+        else:
+            self.rate *= 1 + self.gain * (1 - feedback.backlog / self.target_backlog)
+        self.rate = min(max(self.rate, self.min_rate), self.max_rate)
@@ -0,0 +1,103 @@
+import hashlib
+
+TILE_SIZE = 64
+DIGEST_SIZE = 8
+
+# Байтів на піксель у буферах DisplayDrawer (RGB888)
+BYTES_PER_PIXEL = 3
+
+
+class FrameHasher:
+    """
+    Хеші вмісту кадру по плитках TILE_SIZE x TILE_SIZE.
+
+    Малювання позначає змінені області через mark_dirty(), і update()
+    перераховує лише хеші позначених плиток. Хеш кадру - blake2b від
+    хешів усіх плиток, тож однаковий вміст дає однаковий хеш незалежно
+    від того, якими командами його намальовано.
+
+    Очищення екрана не робить брудними всі плитки: вміст чорної плитки
+    відомий, тож її хеш підставляється без читання пікселів. Кадр, який
+    відправник щоразу очищує і малює наново, коштує лише плиток, на яких
+    щось намальовано.
+    """
+
+    def __init__(self, width, height, tile_size=TILE_SIZE):
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.columns = (width + tile_size - 1) // tile_size
+        self.rows = (height + tile_size - 1) // tile_size
+        self.tiles = [b''] * (self.columns * self.rows)
+        self._dirty = bytearray(b'\x01') * len(self.tiles)
+        self._any_dirty = True
+        self._frame_hash = None
+        self._blank_hashes = {}
+        self.tiles_hashed = 0
+
+    def mark_dirty(self, x0, y0, x1, y1):
+        """Позначення зміненого прямокутника (включно, у межах кадру)."""
+        size = self.tile_size
+        c0, c1 = x0 // size, x1 // size
+        for row in range(y0 // size, y1 // size + 1):
+            start = row * self.columns
+            self._dirty[start + c0:start + c1 + 1] = b'\x01' * (c1 - c0 + 1)
+        self._any_dirty = True
+
+    def mark_pixel(self, x, y):
+        """Позначення одного зміненого пікселя (у межах кадру)."""
+        size = self.tile_size
+        self._dirty[y // size * self.columns + x // size] = 1
+        self._any_dirty = True
+
+    def mark_all(self):
+        self._dirty[:] = b'\x01' * len(self._dirty)
+        self._any_dirty = True
+
+    def mark_cleared(self):
+        """Увесь кадр залито чорним: хеші плиток відомі без читання пікселів."""
+        size = self.tile_size
+        for row in range(self.rows):
+            h = min(size, self.height - row * size)
+            for column in range(self.columns):
+                w = min(size, self.width - column * size)
+                self.tiles[row * self.columns + column] = self._blank_hash(w, h)
+        self._dirty[:] = bytes(len(self._dirty))
+        self._any_dirty = True
+
+    def _blank_hash(self, w, h):
+        blank = self._blank_hashes.get((w, h))
+        if blank is None:
+            blank = hashlib.blake2b(bytes(w * h * BYTES_PER_PIXEL), digest_size=DIGEST_SIZE).digest()
+            self._blank_hashes[(w, h)] = blank
+        return blank
+
+    def update(self, image) -> bytes:
+        """
+        Перерахунок хешів змінених плиток.
+
+        Args:
+            image: Зображення PIL, у яке велося малювання
+
+        Returns:
+            bytes: Хеш кадру
+        """
+        if not self._any_dirty:
+            return self._frame_hash
+
+        size = self.tile_size
+        tiles = self.tiles
+        dirty = self._dirty
+        index = dirty.find(1)
+        while index != -1:
+            row, column = divmod(index, self.columns)
+            x0, y0 = column * size, row * size
+            box = (x0, y0, min(x0 + size, self.width), min(y0 + size, self.height))
+            tiles[index] = hashlib.blake2b(image.crop(box).tobytes(), digest_size=DIGEST_SIZE).digest()
+            dirty[index] = 0
+            self.tiles_hashed += 1
+            index = dirty.find(1, index + 1)
+
+        self._any_dirty = False
+        self._frame_hash = hashlib.blake2b(b''.join(tiles), digest_size=DIGEST_SIZE).digest()
+        return self._frame_hash
@@ -0,0 +1,119 @@
+import logging
+import threading
+from udp_server import UDPServer
+from display_drawer import DisplayDrawer
+
+
+class HeadlessEmulator:
+    """
+    Емулятор дисплея без графічного інтерфейсу.
+
+    Не імпортує tkinter, а Pillow завантажується лише при створенні
+    DisplayDrawer, тому модуль швидко імпортується у процесах відтворення
+    та CI. Кадри можна забирати через SharedFramebuffer або get_image().
+    """
+
+    def __init__(self, width=1024, height=768, host='127.0.0.1', port=12345,
+                 shared_framebuffer=None, double_buffered=False, workers=1):
+        self.width = width
+        self.height = height
+        self.shared_framebuffer = shared_framebuffer
+        self.display_drawer = DisplayDrawer(width, height, double_buffered)
+        self.frames_presented = 0
+        # Кадри, не опубліковані повторно, бо їхній вміст не змінився
+        self.frames_skipped = 0
+        self._published_hash = None
+
+        # Команди з UDP виконуються в потоці сервера, тож малювання серіалізуємо
+        self._lock = threading.Lock()
+        if workers > 1:
+            from sharded_server import ShardedUDPServer
+            self.udp_server = ShardedUDPServer(host, port, self.process_command, workers)
+        else:
+            self.udp_server = UDPServer(host, port, self.process_command)
+
+    def process_command(self, command_data):
+        with self._lock:
+            if self.display_drawer.render(command_data):
+                self.present()
+        self.udp_server.command_done(command_data)
+
+    def present(self):
+        self.frames_presented += 1
+        if self.shared_framebuffer is None:
+            return
+        frame_hash = self.display_drawer.frame_hash()
+        if frame_hash == self._published_hash:
+            self.frames_skipped += 1
+            return
+        self._published_hash = frame_hash
+        self.shared_framebuffer.publish(self.display_drawer.get_image())
+
+    def get_image(self):
+        with self._lock:
+            return self.display_drawer.get_image().copy()
+
+    def frame_hash(self):
+        """Хеш вмісту показаного кадру для швидкого порівняння кадрів."""
+        with self._lock:
+            return self.display_drawer.frame_hash()
+
+    def start(self):
+        self.udp_server.start()
+
+    def stop(self):
+        self.udp_server.stop()
+        if self.shared_framebuffer is not None:
+            self.shared_framebuffer.close()
+            if self.shared_framebuffer.name is not None:
+                self.shared_framebuffer.unlink()
+
+    def run(self):
+        self.start()
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+
+def main(argv=None):
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Headless Display Emulator")
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=12345)
+    arg_parser.add_argument('--width', type=int, default=1024)
+    arg_parser.add_argument('--height', type=int, default=768)
+    arg_parser.add_argument('--framebuffer', metavar='PATH',
+                            help="publish frames to a memory-mapped file")
+    arg_parser.add_argument('--shm', metavar='NAME',
+                            help="publish frames to a POSIX shared memory segment")
+    arg_parser.add_argument('--double-buffer', action='store_true',
+                            help="draw into a back buffer and show it only on Present (0x0D)")
+    arg_parser.add_argument('--workers', type=int, default=1,
+                            help="receive and parse in N processes sharing the port via SO_REUSEPORT")
+    arg_parser.add_argument('--quiet', action='store_true',
+                            help="log warnings and errors only")
+    args = arg_parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.quiet:
+        # Логери парсера і сервера самі встановлюють рівень INFO, тож вимикаємо глобально
+        logging.disable(logging.INFO)
+
+    shared_framebuffer = None
+    if args.framebuffer or args.shm:
+        from shared_framebuffer import SharedFramebuffer
+        shared_framebuffer = SharedFramebuffer(args.width, args.height, path=args.framebuffer, name=args.shm)
+        logging.info(f"Publishing frames to {args.framebuffer or shared_framebuffer.name}")
+
+    emulator = HeadlessEmulator(args.width, args.height, args.host, args.port,
+                                shared_framebuffer, args.double_buffer, args.workers)
+    emulator.run()
+
+
+if __name__ == "__main__":
+    main()
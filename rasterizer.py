@@ -0,0 +1,389 @@
+from itertools import chain
+from math import isqrt
+
+
+OUTLINE_WIDTH = 2
+# На скільки рядків назад починати обхід чверті при пошуку входу в рядок
+_RESYNC_ROWS = 4
+
+
+def _snap(x, parity):
+    """Найбільше x' <= x, що має ту ж парність, що й parity."""
+    return x - (x - parity) % 2
+
+
+class _Quarter:
+    """
+    Чверть еліпса так, як її обходить Pillow (quarter_* у libImaging/Draw.c).
+
+    Pillow працює на сітці з кроком 2 з напівосями a і b (подвоєні розміри
+    рамки) і йде від (a, b % 2) до (a % 2, b), на кожному кроці обираючи
+    серед «вгору», «по діагоналі» та «вліво» точку з найменшим відхиленням
+    |a²y² + b²x² - a²b²|. Обидва рішення зводяться до порогів рядка:
+    у рядку y обхід іде вліво, доки x більший за _left_limit(y), а при
+    переході в рядок y обирає діагональ, якщо x більший за _stay_limit(y).
+    Тому крайні точки рядка обчислюються за O(1), і обхід не треба
+    починати з першого рядка чверті.
+    """
+
+    def __init__(self, a, b):
+        self.a = a
+        self.b = b
+        self.leftmost = a % 2
+        self.a2 = a * a
+        self.b2 = b * b
+
+    def _left_limit(self, y):
+        """Точка рядка y, на якій обхід припиняє рух уліво."""
+        k = 2 * self.a2 * (self.b2 - y * y - 2 * y - 2)
+        if k < 0 or not self.b2:
+            return self.leftmost
+        return max(_snap(2 + isqrt(k // (2 * self.b2)), self.a), self.leftmost)
+
+    def _stay_limit(self, y):
+        """Найбільша точка, з якої крок у рядок y робиться вгору, а не по діагоналі."""
+        q = self.a2 * (self.b2 - y * y) - self.b2
+        if q < 0 or not self.b2:
+            return self.leftmost
+        return max(_snap(1 + isqrt(q // self.b2), self.a), self.leftmost)
+
+    def _next_entry(self, y, entry):
+        """Точка входу в рядок y + 2 для обходу, що ввійшов у рядок y в entry."""
+        leave = min(entry, self._left_limit(y))
+        if leave <= 1:
+            return leave
+        return min(leave, max(self._stay_limit(y + 2), leave - 2))
+
+    def _entry(self, y):
+        """
+        Точка, якою обхід входить у рядок y.
+
+        Вхід у рядок лежить між min(_stay_limit(y), _left_limit(y - 2)) і
+        min(a, _left_limit(y - 2)), а _next_entry монотонний, тож обходи з
+        обох меж, початі на кілька рядків раніше, після злиття дають точний
+        вхід. Якщо вони не злилися, початок відсувається далі назад.
+        """
+        first = self.b % 2
+        margin = _RESYNC_ROWS
+        while y - 2 * margin > first:
+            start = y - 2 * margin
+            previous = self._left_limit(start - 2)
+            low = min(self._stay_limit(start), previous)
+            high = min(self.a, previous)
+            for row in range(start, y, 2):
+                low = self._next_entry(row, low)
+                high = self._next_entry(row, high)
+            if low == high:
+                return low
+            margin *= 4
+        entry = self.a
+        for row in range(first, y, 2):
+            entry = self._next_entry(row, entry)
+        return entry
+
+    def rows(self, y_from, y_to):
+        """
+        Крайні точки рядків чверті.
+
+        Пороги рядка потрібні лише там, де обхід справді рухається вліво
+        чи по діагоналі; для решти рядків досить перевірити поточну точку.
+
+        Args:
+            y_from, y_to: Перший і останній рядок (парність як у b, в межах [b % 2, b])
+
+        Returns:
+            list: (xmax, xmin) для рядків y_from, y_from + 2, ..., y_to
+        """
+        a2, b2 = self.a2, self.b2
+        a2b2 = a2 * b2
+        result = []
+        entry = self._entry(y_from)
+        for y in range(y_from, y_to + 1, 2):
+            leave = entry
+            if entry > 1 and b2 * (entry - 2) ** 2 > a2b2 - a2 * (y * y + 2 * y + 2):
+                leave = min(entry, self._left_limit(y))
+            result.append((entry, leave))
+            if y == y_to:
+                break
+            entry = leave
+            if leave > 1:
+                # Діагональ, якщо leave більша за _stay_limit(y + 2)
+                limit = a2b2 - a2 * (y + 2) ** 2 - b2
+                if b2 * (leave - 1) ** 2 > limit:
+                    entry = leave - 2
+        return result
+
+
+def _clip_spans(spans, cx0, cx1):
+    """Обрізання відсортованих проміжків рядка по x зі злиттям суміжних."""
+    merged = []
+    for xa, xb in spans:
+        xa, xb = max(xa, cx0), min(xb, cx1)
+        if xa > xb:
+            continue
+        if merged and xa <= merged[-1][1] + 1:
+            if xb > merged[-1][1]:
+                merged[-1] = (merged[-1][0], xb)
+        else:
+            merged.append((xa, xb))
+    return tuple(merged)
+
+
+def _ellipse_rows(x0, y0, x1, y1, width, clip, sx=0, sy=0):
+    """
+    Рядки еліпса Pillow (ellipse_* і ellipseNew у libImaging/Draw.c).
+
+    Контур товщиною width - це проміжок між зовнішньою чвертю (a, b) і
+    внутрішньою (a - 2(width - 1), b - 2(width - 1)). Знаки sx і sy
+    залишають лише праву/ліву (1/-1) і нижню/верхню половину, як
+    відсікання кутів дугами та секторами в Pillow; 0 - без обмеження.
+
+    Рядки обрізаються до clip ще до обчислень, тому фігури, що майже
+    повністю лежать за межами екрана, коштують лише видимі рядки.
+
+    Yields:
+        tuple: (y, spans), де spans - відсортований кортеж пар (xa, xb) включно
+    """
+    a, b = x1 - x0, y1 - y0
+    cx0, cy0, cx1, cy1 = clip
+    top, bottom = max(y0, cy0), min(y1, cy1)
+    if width < 1 or a < 0 or b < 0 or top > bottom:
+        return
+    # Піксельний рядок y відповідає рядку чверті |2(y - y0) - b|
+    first, last = 2 * (top - y0) - b, 2 * (bottom - y0) - b
+    if first <= 0 <= last:
+        q_from = b % 2
+    else:
+        q_from = min(abs(first), abs(last))
+    q_to = max(abs(first), abs(last))
+    outer = _Quarter(a, b).rows(q_from, q_to)
+
+    leftmost = a % 2
+    ai, bi = a - 2 * (width - 1), b - 2 * (width - 1)
+    inner = []
+    if ai >= 0 and bi >= 0 and q_from <= bi:
+        inner = _Quarter(ai, bi).rows(q_from, min(q_to, bi))
+
+    # Проміжки рядка чверті спільні для двох симетричних піксельних рядків
+    row_spans = []
+    for index, (r, _) in enumerate(outer):
+        xa, xb = x0 + (a - r) // 2, x0 + (a + r) // 2
+        if xb < cx0 or xa > cx1:
+            row_spans.append(())
+            continue
+        if index >= len(inner) and not sx:
+            # Без внутрішньої чверті ліва й права половини рядка суміжні
+            row_spans.append(((max(xa, cx0), min(xb, cx1)),))
+            continue
+        l = inner[index][1] if index < len(inner) else leftmost
+        if not sx and x0 + (a - l) // 2 < cx0 and x0 + (a + l) // 2 > cx1:
+            # Обидві сторони контуру за межами clip
+            row_spans.append(())
+            continue
+        segments = [(-r, -l)]
+        if l > 0 or l < r:
+            segments.append((2 if l == 0 else l, r))
+        spans = []
+        for xa, xb in segments:
+            if sx < 0:
+                xb = min(xb, 0)
+            elif sx > 0:
+                xa = max(xa, 0)
+            if xa <= xb:
+                spans.append((x0 + (xa + a) // 2, x0 + (xb + a) // 2))
+        row_spans.append(_clip_spans(spans, cx0, cx1))
+
+    for y in range(top, bottom + 1):
+        row = 2 * (y - y0) - b
+        if sy * row < 0:
+            continue
+        spans = row_spans[(abs(row) - q_from) // 2]
+        if spans:
+            yield y, spans
+
+
+def _rectangle_boxes(x0, y0, x1, y1, clip):
+    """Заповнений прямокутник (включно), обрізаний до clip."""
+    if y0 > y1:
+        y0, y1 = y1, y0
+    cx0, cy0, cx1, cy1 = clip
+    box = (max(x0, cx0), max(y0, cy0), min(x1, cx1), min(y1, cy1))
+    if box[0] > box[2] or box[1] > box[3]:
+        return []
+    return [box]
+
+
+def _rectangle_outline_rows(x0, y0, x1, y1, width, clip):
+    """
+    Рядки контуру прямокутника так, як його малює Pillow.
+
+    Вертикальні лінії Pillow малює без кінцевої точки, тож на виродженій
+    рамці (нульова ширина чи висота) контур виходить за її межі.
+    """
+    if y0 > y1:
+        y0, y1 = y1, y0
+    width = width or 1
+    edges = {y0 + i for i in range(width)} | {y1 - i for i in range(width)}
+    ya, yb = y0 + width, y1 - width + 1
+    if ya < yb:
+        va, vb = ya, yb - 1
+    elif ya > yb:
+        va, vb = yb + 1, ya
+    else:
+        va, vb = 1, 0
+    columns = [(x, x) for i in range(width) for x in (x0 + i, x1 - i)]
+
+    cx0, cy0, cx1, cy1 = clip
+    top = min(min(edges), va) if va <= vb else min(edges)
+    bottom = max(max(edges), vb) if va <= vb else max(edges)
+    for y in range(max(top, cy0), min(bottom, cy1) + 1):
+        spans = [(x0, x1)] if y in edges and x0 <= x1 else []
+        if va <= y <= vb:
+            spans = sorted(spans + columns)
+        spans = _clip_spans(spans, cx0, cx1)
+        if spans:
+            yield y, spans
+
+
+def _rounded_rectangle_parts(x0, y0, x1, y1, radius, clip, filled, width):
+    """
+    Частини прямокутника з заокругленими кутами за ImageDraw.rounded_rectangle.
+
+    Кути - чверті (або половини, якщо кути зливаються) еліпса в рамці
+    d x d, решта - прямокутники; з'єднані кути дають еліпс, а d == 0 -
+    звичайний прямокутник. Частини можуть перекриватися.
+
+    Returns:
+        list: Ітератори прямокутників (xa, ya, xb, yb) включно
+    """
+    d = min(x1 - x0, y1 - y0, radius * 2)
+    full_x = d >= x1 - x0 - 1
+    if full_x:
+        d = x1 - x0
+    full_y = d >= y1 - y0 - 1
+    if full_y:
+        d = y1 - y0
+    if full_x and full_y:
+        ellipse_width = x1 - x0 + y1 - y0 if filled else width
+        return [_coalesce(_ellipse_rows(x0, y0, x1, y1, ellipse_width, clip))]
+    if d == 0:
+        if filled:
+            return [_rectangle_boxes(x0, y0, x1, y1, clip)]
+        return [_coalesce(_rectangle_outline_rows(x0, y0, x1, y1, width, clip))]
+
+    r = d // 2
+    corner_width = 2 * d if filled else width
+    if full_x:
+        corners = [((x0, y0), 0, -1), ((x0, y1 - d), 0, 1)]
+    elif full_y:
+        corners = [((x0, y0), -1, 0), ((x1 - d, y0), 1, 0)]
+    else:
+        corners = [((x0, y0), -1, -1), ((x1 - d, y0), 1, -1),
+                   ((x1 - d, y1 - d), 1, 1), ((x0, y1 - d), -1, 1)]
+    parts = [_coalesce(_ellipse_rows(cx, cy, cx + d, cy + d, corner_width, clip, sx, sy))
+             for (cx, cy), sx, sy in corners]
+
+    if filled:
+        if full_x:
+            parts.append(_rectangle_boxes(x0, y0 + r + 1, x1, y1 - r - 1, clip))
+        elif x1 - r - 1 >= x0 + r + 1:
+            parts.append(_rectangle_boxes(x0 + r + 1, y0, x1 - r - 1, y1, clip))
+        if not full_x and not full_y:
+            parts.append(_rectangle_boxes(x0, y0 + r + 1, x0 + r, y1 - r - 1, clip))
+            parts.append(_rectangle_boxes(x1 - r, y0 + r + 1, x1, y1 - r - 1, clip))
+        return parts
+
+    if not full_x:
+        parts.append(_rectangle_boxes(x0 + r + 1, y0, x1 - r - 1, y0 + width - 1, clip))
+        parts.append(_rectangle_boxes(x0 + r + 1, y1 - width + 1, x1 - r - 1, y1, clip))
+    if not full_y:
+        parts.append(_rectangle_boxes(x0, y0 + r + 1, x0 + width - 1, y1 - r - 1, clip))
+        parts.append(_rectangle_boxes(x1 - width + 1, y0 + r + 1, x1, y1 - r - 1, clip))
+    return parts
+
+
+def _coalesce(rows):
+    """
+    Об'єднання сусідніх рядків з однаковими проміжками у прямокутники.
+
+    Yields:
+        tuple: (xa, ya, xb, yb) включно
+    """
+    run_spans = None
+    run_start = run_end = 0
+    for y, spans in rows:
+        if spans == run_spans and y == run_end + 1:
+            run_end = y
+            continue
+        if run_spans is not None:
+            for xa, xb in run_spans:
+                yield xa, run_start, xb, run_end
+        run_spans, run_start, run_end = spans, y, y
+    if run_spans is not None:
+        for xa, xb in run_spans:
+            yield xa, run_start, xb, run_end
+
+
+def _outside(x0, y0, x1, y1, clip):
+    cx0, cy0, cx1, cy1 = clip
+    return x1 < x0 or y1 < y0 or x1 < cx0 or x0 > cx1 or y1 < cy0 or y0 > cy1
+
+
+def mostly_clipped(x0, y0, x1, y1, clip, threshold=0.25):
+    """
+    Чи лежить фігура здебільшого за межами області відсікання.
+
+    Для таких фігур построкова растеризація дешевша за Pillow, який
+    обробляє фігуру повністю; видимі фігури вигідніше малювати в C.
+    """
+    cx0, cy0, cx1, cy1 = clip
+    visible_w = min(x1, cx1) - max(x0, cx0) + 1
+    visible_h = min(y1, cy1) - max(y0, cy0) + 1
+    if visible_w <= 0 or visible_h <= 0:
+        return True
+    return visible_w * visible_h < threshold * (x1 - x0 + 1) * (y1 - y0 + 1)
+
+
+def ellipse_boxes(x0, y0, x1, y1, clip, filled=False, width=OUTLINE_WIDTH):
+    """
+    Растеризація еліпса, вписаного в рамку [x0, y0, x1, y1].
+
+    Пікселі збігаються з ImageDraw.ellipse для тієї ж рамки.
+
+    Args:
+        x0, y0, x1, y1: Рамка еліпса (включно, як у Pillow)
+        clip: Область відсікання (cx0, cy0, cx1, cy1) включно
+        filled: Заповнений еліпс чи контур
+        width: Товщина контуру всередину фігури
+
+    Returns:
+        Ітератор прямокутників (xa, ya, xb, yb) включно для заливки
+    """
+    if _outside(x0, y0, x1, y1, clip):
+        return iter(())
+    if filled:
+        width = x1 - x0 + y1 - y0
+    return _coalesce(_ellipse_rows(x0, y0, x1, y1, width, clip))
+
+
+def rounded_rectangle_boxes(x0, y0, x1, y1, radius, clip, filled=False, width=OUTLINE_WIDTH):
+    """
+    Растеризація прямокутника з заокругленими кутами.
+
+    Пікселі збігаються з ImageDraw.rounded_rectangle для тієї ж рамки,
+    зокрема для виродженої рамки, контур якої Pillow малює за її межами.
+
+    Args:
+        x0, y0, x1, y1: Рамка прямокутника (включно)
+        radius: Радіус заокруглення
+        clip: Область відсікання (cx0, cy0, cx1, cy1) включно
+        filled: Заповнений прямокутник чи контур
+        width: Товщина контуру всередину фігури
+
+    Returns:
+        Ітератор прямокутників (xa, ya, xb, yb) включно для заливки; вони
+        можуть перекриватися
+    """
+    if x1 < x0 or y1 < y0 or _outside(x0 - width, y0 - width, x1 + width, y1 + width, clip):
+        return iter(())
+    return chain.from_iterable(_rounded_rectangle_parts(x0, y0, x1, y1, radius, clip, filled, width))
@@ -0,0 +1,242 @@
+import random
+import socket
+import struct
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+# Конверт надійної доставки: magic, ID сесії, номер пакета, найменший
+# непідтверджений номер відправника, далі - звичайна команда
+RELIABLE_MAGIC = 0xA5
+ENVELOPE = struct.Struct('>BIII')
+
+# Підтвердження: magic, ID сесії, наступний очікуваний номер, бітова маска
+# отриманих пакетів після нього (біт i - пакет cumulative + 1 + i)
+ACK_MAGIC = 0xA6
+ACK = struct.Struct('>BIII')
+
+WINDOW = 32
+MAX_SESSIONS = 1024
+# Сесія без конвертів довше за SESSION_TTL секунд вважається покинутою
+SESSION_TTL = 5.0
+
+# Відправник здається, якщо вікно не звільняється за SEND_TIMEOUT секунд
+# або пакет не підтверджено після MAX_RETRANSMITS повторів
+SEND_TIMEOUT = 5.0
+MAX_RETRANSMITS = 20
+
+_SEQ_MASK = 0xFFFFFFFF
+
+
+def _seq_offset(seq, base):
+    """Відстань від base до seq за модулем 2^32."""
+    return (seq - base) & _SEQ_MASK
+
+
+class _Session:
+    def __init__(self, session_id, next_seq, now):
+        self.session_id = session_id
+        self.next_seq = next_seq
+        self.pending = {}
+        self.last_seen = now
+
+    def ack(self):
+        bitmap = 0
+        for seq in self.pending:
+            offset = _seq_offset(seq, self.next_seq) - 1
+            if 0 <= offset < 32:
+                bitmap |= 1 << offset
+        return ACK.pack(ACK_MAGIC, self.session_id, self.next_seq, bitmap)
+
+
+class ReliableReceiver:
+    """
+    Серверна частина надійної доставки.
+
+    Для кожного відправника зберігає номер наступного очікуваного пакета
+    та пакети, що прийшли раніше за нього. Команди віддаються строго по
+    порядку, дублікати відкидаються, а на кожен конверт формується
+    кумулятивне підтвердження з бітовою маскою вибіркових підтверджень.
+
+    Нова сесія починає з найменшого непідтвердженого номера відправника з
+    конверта, тож перезапуск сервера чи витіснення сесії не змушують
+    чекати пакетів, які відправник уже вважає доставленими. Конверт з
+    іншим ID сесії замінює активну сесію, лише якщо потік нової сесії
+    починається з нуля або стара сесія простоює довше за session_ttl.
+    """
+
+    def __init__(self, window: int = WINDOW, max_sessions: int = MAX_SESSIONS,
+                 session_ttl: float = SESSION_TTL):
+        self.window = window
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.sessions = OrderedDict()
+        self.duplicates = 0
+        self.out_of_window = 0
+        self.foreign_sessions = 0
+
+    def receive(self, data: bytes, addr, now: Optional[float] = None) -> Tuple[List[bytes], Optional[bytes]]:
+        """
+        Обробка конверта від відправника.
+
+        Args:
+            data: Отримана датаграма, що починається з RELIABLE_MAGIC
+            addr: Адреса відправника
+            now: Час отримання (time.monotonic()); за замовчуванням - поточний
+
+        Returns:
+            Tuple[List[bytes], Optional[bytes]]: Команди, готові до виконання
+            по порядку, та підтвердження для відправника (None для битого
+            конверта чи конверта чужої сесії)
+        """
+        if len(data) < ENVELOPE.size:
+            return [], None
+        if now is None:
+            now = time.monotonic()
+        _, session_id, seq, base = ENVELOPE.unpack_from(data)
+
+        session = self.sessions.get(addr)
+        if session is not None and session.session_id != session_id:
+            if base != 0 and now - session.last_seen <= self.session_ttl:
+                # Активну сесію не може перехопити конверт з середини чужого потоку
+                self.foreign_sessions += 1
+                return [], None
+            session = None
+        if session is None:
+            # Новий відправник, перезапуск відправника чи сервера
+            session = _Session(session_id, base, now)
+            self.sessions[addr] = session
+            if len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        self.sessions.move_to_end(addr)
+        session.last_seen = now
+
+        offset = _seq_offset(seq, session.next_seq)
+        if offset >= 1 << 31 or seq in session.pending:
+            self.duplicates += 1
+            return [], session.ack()
+        if offset >= self.window:
+            self.out_of_window += 1
+            return [], session.ack()
+
+        session.pending[seq] = data[ENVELOPE.size:]
+        delivered = []
+        while session.next_seq in session.pending:
+            delivered.append(session.pending.pop(session.next_seq))
+            session.next_seq = (session.next_seq + 1) & _SEQ_MASK
+        return delivered, session.ack()
+
+
+class ReliableSender:
+    """
+    Клієнтська частина надійної доставки з вікном повторної передачі.
+
+    Непідтверджені пакети зберігаються до отримання кумулятивного або
+    вибіркового підтвердження; повторно надсилаються лише ті, що не були
+    підтверджені протягом rto секунд, і не більше max_retransmits разів.
+    Після цього сервер вважається недосяжним: повтори припиняються, а
+    send() на заповненому вікні кидає TimeoutError.
+    """
+
+    def __init__(self, sock: socket.socket, address, window: int = WINDOW, rto: float = 0.05,
+                 timeout: float = SEND_TIMEOUT, max_retransmits: int = MAX_RETRANSMITS):
+        self.sock = sock
+        self.address = address
+        self.window = window
+        self.rto = rto
+        self.timeout = timeout
+        self.max_retransmits = max_retransmits
+        self.session_id = random.getrandbits(32)
+        self.next_seq = 0
+        # seq -> [команда, час останньої передачі, кількість повторів]
+        self.unacked = OrderedDict()
+        self.retransmissions = 0
+        self.gave_up = False
+
+    def send(self, payload: bytes):
+        """
+        Надсилання команди; блокується, поки вікно заповнене.
+
+        Raises:
+            TimeoutError: Вікно не звільнилося за timeout секунд або
+                повтори непідтвердженого пакета вичерпано
+        """
+        self.poll()
+        deadline = time.monotonic() + self.timeout
+        while len(self.unacked) >= self.window:
+            remaining = deadline - time.monotonic()
+            if self.gave_up or remaining <= 0:
+                raise TimeoutError(f"No acknowledgement from {self.address} for {len(self.unacked)} commands")
+            self.poll(min(self.rto, remaining))
+
+        seq = self.next_seq
+        self.unacked[seq] = [payload, time.monotonic(), 0]
+        self.next_seq = (seq + 1) & _SEQ_MASK
+        self.sock.sendto(self._envelope(seq, payload), self.address)
+
+    def _envelope(self, seq: int, payload: bytes) -> bytes:
+        # Найменший непідтверджений номер береться на момент передачі, щоб
+        # повтор після перезапуску сервера не вказував на вже підтверджені пакети
+        base = next(iter(self.unacked), self.next_seq)
+        return ENVELOPE.pack(RELIABLE_MAGIC, self.session_id, seq, base) + payload
+
+    def poll(self, timeout: float = 0.0):
+        """Обробка отриманих підтверджень і повторна передача прострочених пакетів."""
+        deadline = time.monotonic() + timeout
+        previous_timeout = self.sock.gettimeout()
+        try:
+            while True:
+                # settimeout(0.0) переводить сокет у неблокуючий режим
+                self.sock.settimeout(max(deadline - time.monotonic(), 0.0))
+                try:
+                    data, _ = self.sock.recvfrom(64)
+                except (socket.timeout, BlockingIOError):
+                    break
+                self.process_ack(data)
+                if not self.unacked:
+                    break
+        finally:
+            self.sock.settimeout(previous_timeout)
+        self._retransmit_expired()
+
+    def process_ack(self, data: bytes):
+        if len(data) != ACK.size or data[0] != ACK_MAGIC:
+            return
+        _, session_id, cumulative, bitmap = ACK.unpack(data)
+        if session_id != self.session_id:
+            return
+
+        for seq in list(self.unacked):
+            offset = _seq_offset(seq, cumulative)
+            if offset >= 1 << 31:
+                del self.unacked[seq]
+            elif 0 < offset <= 32 and bitmap & (1 << (offset - 1)):
+                del self.unacked[seq]
+        if self.gave_up:
+            # Сервер відповів: здаємося, лише поки лишаються пакети з вичерпаними повторами
+            self.gave_up = any(entry[2] >= self.max_retransmits for entry in self.unacked.values())
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        """
+        Очікування підтвердження всіх надісланих команд.
+
+        Returns:
+            bool: True, якщо всі команди підтверджені
+        """
+        deadline = time.monotonic() + timeout
+        while self.unacked and not self.gave_up and time.monotonic() < deadline:
+            self.poll(min(self.rto, max(deadline - time.monotonic(), 0)))
+        return not self.unacked
+
+    def _retransmit_expired(self):
+        now = time.monotonic()
+        for seq, entry in self.unacked.items():
+            if now - entry[1] < self.rto:
+                continue
+            if entry[2] >= self.max_retransmits:
+                self.gave_up = True
+                continue
+            self.sock.sendto(self._envelope(seq, entry[0]), self.address)
+            entry[1] = now
+            entry[2] += 1
+            self.retransmissions += 1
@@ -1,55 +1,106 @@
+import argparse
 import socket
 import struct
+from feedback import PacedSender
+from reliable import ReliableSender
 
-def send_command(command_bytes):
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    server_address = ('localhost', 12345)
-    sock.sendto(command_bytes, server_address)
+SERVER_ADDRESS = ('localhost', 12345)
+
+
+def send_command(command_bytes, sock=None, reliable=None, paced=None):
+    if reliable is not None:
+        reliable.send(command_bytes)
+    elif paced is not None:
+        paced.send(command_bytes)
+    else:
+        if sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.sendto(command_bytes, SERVER_ADDRESS)
     print(f"Sent: {command_bytes.hex()}")
 
-# 1. Clear Display (0x01)
-send_command(b'\x01\x1F\x00')  # Clear with color RGB565(0x1F00)
 
-# 2. Draw Pixel (0x02)
-send_command(b'\x02\x00\x64\x00\xC8\x07\xE0')  # Draw pixel at (100, 200) with color RGB565(0x07E0)
+def send_demo(send):
+    # 1. Clear Display (0x01)
+    send(b'\x01\x1F\x00')  # Clear with color RGB565(0x1F00)
+
+    # 2. Draw Pixel (0x02)
+    send(b'\x02\x00\x64\x00\xC8\x07\xE0')  # Draw pixel at (100, 200) with color RGB565(0x07E0)
+
+    # 3. Draw Line (0x03)
+    send(b'\x03\x00\x0A\x00\x14\x00\x64\x00\xC8\x1F\x00')  # Line from (10, 20) to (100, 200) with color RGB565(0x1F00)
 
-# 3. Draw Line (0x03)
-send_command(b'\x03\x00\x0A\x00\x14\x00\x64\x00\xC8\x1F\x00')  # Line from (10, 20) to (100, 200) with color RGB565(0x1F00)
+    # 4. Draw Rectangle (0x04)
+    send(b'\x04\x00\x32\x00\x32\x00\x64\x00\x64\xF8\x00')  # Rectangle at (50, 50), width 100, height 100, color RGB565(0xF800)
 
-# 4. Draw Rectangle (0x04)
-send_command(b'\x04\x00\x32\x00\x32\x00\x64\x00\x64\xF8\x00')  # Rectangle at (50, 50), width 100, height 100, color RGB565(0xF800)
+    # 5. Fill Rectangle (0x05)
+    send(b'\x05\x00\x64\x00\x64\x00\x32\x00\x32\x07\xE0')  # Fill rectangle at (100, 100), width 50, height 50, color RGB565(0x07E0)
 
-# 5. Fill Rectangle (0x05)
-send_command(b'\x05\x00\x64\x00\x64\x00\x32\x00\x32\x07\xE0')  # Fill rectangle at (100, 100), width 50, height 50, color RGB565(0x07E0)
+    # 6. Draw Ellipse (0x06)
+    send(b'\x06\x00\x96\x00\x96\x00\x32\x00\x1E\x1F\x00')  # Ellipse at (150, 150), radius_x 50, radius_y 30, color RGB565(0x1F00)
 
-# 6. Draw Ellipse (0x06)
-send_command(b'\x06\x00\x96\x00\x96\x00\x32\x00\x1E\x1F\x00')  # Ellipse at (150, 150), radius_x 50, radius_y 30, color RGB565(0x1F00)
+    # 7. Fill Ellipse (0x07)
+    send(b'\x07\x00\xC8\x00\xC8\x00\x28\x00\x28\xF8\x00')  # Fill ellipse at (200, 200), radius_x 40, radius_y 40, color RGB565(0xF800)
 
-# 7. Fill Ellipse (0x07)
-send_command(b'\x07\x00\xC8\x00\xC8\x00\x28\x00\x28\xF8\x00')  # Fill ellipse at (200, 200), radius_x 40, radius_y 40, color RGB565(0xF800)
+    # 8. Draw Circle (0x08)
+    send(b'\x08\x00\xFA\x00\xFA\x00\x32\x07\xE0')  # Circle at (250, 250), radius 50, color RGB565(0x07E0)
 
-# 8. Draw Circle (0x08)
-send_command(b'\x08\x00\xFA\x00\xFA\x00\x32\x07\xE0')  # Circle at (250, 250), radius 50, color RGB565(0x07E0)
+    # 9. Fill Circle (0x09)
+    send(b'\x09\x01\x2C\x01\x2C\x00\x28\x1F\x00')  # Fill circle at (300, 300), radius 40, color RGB565(0x1F00)
 
-# 9. Fill Circle (0x09)
-send_command(b'\x09\x01\x2C\x01\x2C\x00\x28\x1F\x00')  # Fill circle at (300, 300), radius 40, color RGB565(0x1F00)
+    # 10. Draw Rounded Rectangle (0x0A)
+    send(b'\x0A\x00\x32\x01\x5E\x00\x64\x00\x32\x00\x0A\xF8\x00')  # Rounded rectangle at (50, 350), width 100, height 50, radius 10, color RGB565(0xF800)
 
-# 10. Draw Rounded Rectangle (0x0A)
-send_command(b'\x0A\x00\x32\x01\x5E\x00\x64\x00\x32\x00\x0A\xF8\x00')  # Rounded rectangle at (50, 350), width 100, height 50, radius 10, color RGB565(0xF800)
+    # 11. Fill Rounded Rectangle (0x0B)
+    send(b'\x0B\x00\x96\x01\x5E\x00\x64\x00\x32\x00\x0A\x07\xE0')  # Fill rounded rectangle at (150, 350), width 100, height 50, radius 10, color RGB565(0x 07E0)
 
-# 11. Fill Rounded Rectangle (0x0B)
-send_command(b'\x0B\x00\x96\x01\x5E\x00\x64\x00\x32\x00\x0A\x07\xE0')  # Fill rounded rectangle at (150, 350), width 100, height 50, radius 10, color RGB565(0x 07E0)
+    # 12. Draw Text (0x0C)
+    text = "Hello, World!"
+    text_bytes = text.encode('utf-8')
+    font_number = 2  
 
-# 12. Draw Text (0x0C)
-text = "Hello, World!"
-text_bytes = text.encode('utf-8')
-font_number = 2  
+    command = struct.pack(">BhhHBB", 0x0C, 50, 50, 0x1F00, font_number, len(text_bytes)) + text_bytes
+    send(command)
 
-command = struct.pack(">BhhHBB", 0x0C, 50, 50, 0x1F00, font_number, len(text_bytes)) + text_bytes
-send_command(command)
+    # 13. Present (0x0D)
+    send(b'\x0D')  # Show the back buffer when the emulator runs with --double-buffer
 
-# 13. Invalid command ID
-send_command(b'\xFF\x00\x00')  # FF is not a valid command ID
+    # 14. Set Clip (0x0E) + Set Viewport (0x0F)
+    send(b'\x0F\x00\x00\x00\x00\x04\x00\x03\x00\x01\x40\x00\xF0')  # Map 320x240 logical onto 1024x768
+    send(b'\x0E\x00\x0A\x00\x0A\x00\x64\x00\x64')  # Clip to logical (10, 10), 100x100
+    send(b'\x09\x00\x3C\x00\x3C\x00\x50\xF8\x00')  # Fill circle at (60, 60), radius 80, clipped
+    send(b'\x0E\x00\x00\x00\x00\x00\x00\x00\x00')  # Reset clip
+    send(b'\x0F\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00')  # Reset viewport
 
-# 14. Invalid parameters for Draw Pixel command
-send_command(b'\x02\x00\x64')  # Not enough parameters for Draw Pixel
+    # 15. Invalid command ID
+    send(b'\xFF\x00\x00')  # FF is not a valid command ID
+
+    # 16. Invalid parameters for Draw Pixel command
+    send(b'\x02\x00\x64')  # Not enough parameters for Draw Pixel
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Send demo commands to the display emulator")
+    # Both modes drive the timeouts of the same socket, so they cannot be combined
+    mode = arg_parser.add_mutually_exclusive_group()
+    mode.add_argument('--reliable', action='store_true',
+                      help="use sequence numbers, acks and retransmission")
+    mode.add_argument('--paced', action='store_true',
+                      help="subscribe to server feedback and pace sending to its backlog")
+    args = arg_parser.parse_args()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    reliable = ReliableSender(sock, SERVER_ADDRESS) if args.reliable else None
+    paced = PacedSender(sock, SERVER_ADDRESS) if args.paced else None
+    try:
+        send_demo(lambda command_bytes: send_command(command_bytes, sock, reliable, paced))
+    except TimeoutError as e:
+        print(f"Emulator is not responding: {e}")
+        return
+    if reliable is not None and not reliable.flush():
+        print(f"Unacknowledged commands: {len(reliable.unacked)}")
+    if paced is not None:
+        print(f"Final send rate: {paced.rate:.0f} commands/s")
+
+
+if __name__ == '__main__':
+    main()
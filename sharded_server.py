@@ -0,0 +1,260 @@
+import logging
+import multiprocessing
+import socket
+import struct
+import threading
+import time
+from typing import Callable, Optional
+
+# Компактні записи розібраних команд: ID команди + поля у фіксованому форматі.
+# DrawText додатково містить текст у UTF-8 після фіксованої частини.
+RECORD_FORMATS = {
+    0x01: (struct.Struct('>H'), ('color',)),
+    0x02: (struct.Struct('>hhH'), ('x', 'y', 'color')),
+    0x03: (struct.Struct('>hhhhH'), ('x0', 'y0', 'x1', 'y1', 'color')),
+    0x04: (struct.Struct('>hhhhH'), ('x0', 'y0', 'w', 'h', 'color')),
+    0x05: (struct.Struct('>hhhhH'), ('x0', 'y0', 'w', 'h', 'color')),
+    0x06: (struct.Struct('>hhhhH'), ('x0', 'y0', 'radius_x', 'radius_y', 'color')),
+    0x07: (struct.Struct('>hhhhH'), ('x0', 'y0', 'radius_x', 'radius_y', 'color')),
+    0x08: (struct.Struct('>hhHH'), ('x0', 'y0', 'radius', 'color')),
+    0x09: (struct.Struct('>hhHH'), ('x0', 'y0', 'radius', 'color')),
+    0x0A: (struct.Struct('>hhhhHH'), ('x0', 'y0', 'w', 'h', 'radius', 'color')),
+    0x0B: (struct.Struct('>hhhhHH'), ('x0', 'y0', 'w', 'h', 'radius', 'color')),
+    0x0C: (struct.Struct('>hhHB'), ('x0', 'y0', 'color', 'font_number')),
+    0x0D: (struct.Struct('>'), ()),
+    0x0E: (struct.Struct('>hhhh'), ('x0', 'y0', 'w', 'h')),
+    0x0F: (struct.Struct('>hhhhHH'), ('x0', 'y0', 'w', 'h', 'logical_w', 'logical_h')),
+}
+
+SLOT_SIZE = 288
+RING_SLOTS = 4096
+
+# Заголовок кільця з 64-бітних слів: індекс запису і індекс читання на
+# окремих кеш-лініях, кількість слотів - в останньому слові
+_HEAD = 0
+_TAIL = 8
+_SLOTS = 15
+_RING_HEADER = 128
+_SLOT_LENGTH = struct.Struct('<H')
+
+
+def encode_command(command_data: dict) -> bytes:
+    """Компактне представлення розібраної команди для передачі між процесами."""
+    command_id = command_data['command_id']
+    record, names = RECORD_FORMATS[command_id]
+    data = bytes([command_id]) + record.pack(*(command_data[name] for name in names))
+    if command_id == 0x0C:
+        data += command_data['text'].encode('utf-8')
+    return data
+
+
+def decode_command(data: bytes) -> dict:
+    """Зворотне перетворення до формату DisplayCommandParser.parse."""
+    command_id = data[0]
+    record, names = RECORD_FORMATS[command_id]
+    command_data = dict(zip(names, record.unpack_from(data, 1)))
+    if command_id == 0x0C:
+        command_data['text'] = data[1 + record.size:].decode('utf-8')
+    command_data['command_id'] = command_id
+    return command_data
+
+
+class CommandRing:
+    """
+    Кільцевий буфер в shared memory з одним записувачем і одним читачем.
+
+    Записи мають фіксовані слоти, тож записувач лише копіює дані в слот і
+    збільшує head, а читач - читає слот і збільшує tail. Індекси читаються
+    і записуються через memoryview формату 'Q' одним вирівняним 8-байтовим
+    доступом; struct.pack_into для цього не годиться, бо спершу обнуляє
+    поле, і читач може побачити head = 0.
+    """
+
+    def __init__(self, name: Optional[str] = None, slots: int = RING_SLOTS):
+        from multiprocessing import shared_memory
+
+        if name is None:
+            size = _RING_HEADER + slots * SLOT_SIZE
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            self._shm.buf[:_RING_HEADER] = bytes(_RING_HEADER)
+            self.owner = True
+        else:
+            # Процеси-обробники запускаються через spawn і ділять resource_tracker
+            # з власником кільця, тож повторна реєстрація сегмента нешкідлива
+            self._shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self._shm.name
+        self._buf = self._shm.buf
+        self._index = self._buf[:_RING_HEADER].cast('Q')
+        if self.owner:
+            self._index[_SLOTS] = slots
+        self.slots = self._index[_SLOTS]
+
+    def put(self, data: bytes) -> bool:
+        """Запис у кільце; False, якщо кільце заповнене."""
+        if len(data) > SLOT_SIZE - _SLOT_LENGTH.size:
+            raise ValueError(f"Record of {len(data)} bytes does not fit into a ring slot")
+        head = self._index[_HEAD]
+        if head - self._index[_TAIL] >= self.slots:
+            return False
+        offset = _RING_HEADER + (head % self.slots) * SLOT_SIZE
+        _SLOT_LENGTH.pack_into(self._buf, offset, len(data))
+        start = offset + _SLOT_LENGTH.size
+        self._buf[start:start + len(data)] = data
+        self._index[_HEAD] = head + 1
+        return True
+
+    def get(self) -> Optional[bytes]:
+        """Читання наступного запису; None, якщо кільце порожнє."""
+        tail = self._index[_TAIL]
+        if tail == self._index[_HEAD]:
+            return None
+        offset = _RING_HEADER + (tail % self.slots) * SLOT_SIZE
+        length = _SLOT_LENGTH.unpack_from(self._buf, offset)[0]
+        start = offset + _SLOT_LENGTH.size
+        data = bytes(self._buf[start:start + length])
+        self._index[_TAIL] = tail + 1
+        return data
+
+    def close(self):
+        self._index.release()
+        self._index = None
+        self._buf = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+def _worker_main(host, port, ring_name, ready, stop):
+    """Процес-обробник: приймає та розбирає пакети і передає команди в кільце."""
+    from udp_server import UDPServer
+
+    # Логування кожної команди з кількох процесів звело б масштабування нанівець
+    logging.disable(logging.INFO)
+    ring = CommandRing(ring_name)
+
+    def forward(command_data):
+        data = encode_command(command_data)
+        # Кільце заповнене - чекаємо читача, а надлишок накопичується в черзі ядра
+        while not ring.put(data):
+            if stop.is_set():
+                return
+            time.sleep(0.0005)
+
+    server = UDPServer(host, port, forward, reuse_port=True)
+    server.start()
+    if server.ready.wait(5):
+        ready.set()
+    stop.wait()
+    server.stop()
+    ring.close()
+
+
+class ShardedUDPServer:
+    """
+    UDP-сервер з кількома процесами-обробниками на одному порту.
+
+    Кожен процес прив'язує власний сокет з SO_REUSEPORT, тож ядро
+    розподіляє відправників між процесами за хешем адрес, і всі пакети
+    одного відправника потрапляють до одного процесу. Процеси розбирають
+    пакети власним DisplayCommandParser і передають компактні записи в
+    окремі кільця shared memory; головний процес вичитує кільця і викликає
+    command_callback. Порядок команд кожного відправника зберігається.
+
+    Надійна доставка працює в процесах-обробниках; зворотний зв'язок
+    відображає лише їхні черги, бо малювання відбувається в головному процесі.
+    """
+
+    def __init__(self, host: str, port: int, command_callback: Callable, workers: int = 2):
+        self.host = host
+        self.port = port
+        self.command_callback = command_callback
+        self.workers = workers
+        self.running = False
+        self.ready = threading.Event()
+        self.delivered = 0
+        self._context = multiprocessing.get_context('spawn')
+        self._processes = []
+        self._rings = []
+
+        self.logger = logging.getLogger('ShardedUDPServer')
+        self.logger.setLevel(logging.INFO)
+
+        if not self.logger.handlers:
+            console_handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            console_handler.setFormatter(formatter)
+            self.logger.addHandler(console_handler)
+
+    def _pick_port(self):
+        # Для порту 0 кожен процес отримав би власний порт, тож обираємо його заздалегідь
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            s.bind((self.host, 0))
+            return s.getsockname()[1]
+
+    def start(self):
+        if self.port == 0:
+            self.port = self._pick_port()
+        self.running = True
+        self._stop = self._context.Event()
+        ready_events = []
+        for _ in range(self.workers):
+            ring = CommandRing()
+            ready = self._context.Event()
+            process = self._context.Process(target=_worker_main,
+                                            args=(self.host, self.port, ring.name, ready, self._stop),
+                                            daemon=True)
+            process.start()
+            self._rings.append(ring)
+            self._processes.append(process)
+            ready_events.append(ready)
+
+        self.thread = threading.Thread(target=self._drain, args=(ready_events,), daemon=True)
+        self.thread.start()
+        self.logger.info(f"Sharded UDP server started on {self.host}:{self.port} with {self.workers} workers")
+
+    def stop(self):
+        self.running = False
+        if hasattr(self, 'thread'):
+            self.thread.join()
+        self._stop.set()
+        for process in self._processes:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+        for ring in self._rings:
+            ring.close()
+        self._processes = []
+        self._rings = []
+        self.logger.info("Sharded UDP server stopped")
+
+    def command_done(self, command_data: dict):
+        """Сумісність з UDPServer; черги малювання головного процесу не відстежуються."""
+
+    def _drain(self, ready_events):
+        for ready in ready_events:
+            if not ready.wait(10):
+                self.logger.error("Worker failed to start")
+        self.ready.set()
+
+        idle = 0
+        while self.running:
+            got = False
+            for ring in self._rings:
+                # Обмежуємо пачку з одного кільця, щоб інші процеси не чекали
+                for _ in range(256):
+                    data = ring.get()
+                    if data is None:
+                        break
+                    got = True
+                    self.delivered += 1
+                    try:
+                        self.command_callback(decode_command(data))
+                    except Exception as e:
+                        self.logger.error(f"Error in command callback: {str(e)}")
+            if got:
+                idle = 0
+            else:
+                idle += 1
+                time.sleep(0.0001 if idle < 100 else 0.002)
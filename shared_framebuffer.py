@@ -0,0 +1,240 @@
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import Optional, Tuple
+
+
+FRAMEBUFFER_MAGIC = b'DMFB'
+FRAMEBUFFER_VERSION = 1
+FORMAT_RGB888 = 1
+
+# magic, version, format, width, height, stride, seq, frame_counter
+HEADER = struct.Struct('<4sHHIIIIQ')
+HEADER_SIZE = 64  # Заголовок вирівняний до розміру кеш-лінії
+SEQ_OFFSET = 20
+FRAME_OFFSET = 24
+
+# Скільки читач чекає завершення запису: запис кадру триває мілісекунди,
+# тож непарний seq довше за це означає, що виробник завершився посеред publish()
+READ_TIMEOUT = 1.0
+
+_SEQ = struct.Struct('<I')
+_FRAME = struct.Struct('<Q')
+
+
+def framebuffer_size(width: int, height: int) -> int:
+    """Повний розмір сегмента (заголовок + пікселі RGB888) у байтах."""
+    return HEADER_SIZE + width * height * 3
+
+
+def _attach_shared_memory(name: str):
+    from multiprocessing import shared_memory
+
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    # До Python 3.13 resource_tracker видаляє сегмент при виході процесу,
+    # який лише приєднався до нього, тож знімаємо реєстрацію вручну.
+    from multiprocessing import resource_tracker
+
+    shm = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+class SharedFramebuffer:
+    """
+    Кадровий буфер у пам'яті, що відображається у файл або у сегмент
+    POSIX shared memory.
+
+    Емулятор публікує кожен показаний кадр у сегмент, а інші процеси
+    (захоплення екрана, тестові оракули, відеокодери) читають пікселі
+    напряму через SharedFramebufferReader без IPC.
+
+    Формат сегмента: 64-байтовий заголовок (див. HEADER), за ним рядки
+    пікселів RGB888. Поле seq є seqlock-лічильником: непарне значення
+    означає, що запис кадру триває.
+    """
+
+    def __init__(self, width: int, height: int, path: Optional[str] = None,
+                 name: Optional[str] = None):
+        """
+        Args:
+            width: Ширина кадру в пікселях
+            height: Висота кадру в пікселях
+            path: Шлях до файлу для mmap; якщо не задано, використовується shared memory
+            name: Ім'я сегмента shared memory (None - згенерувати автоматично)
+        """
+        self.width = width
+        self.height = height
+        self.stride = width * 3
+        self.size = framebuffer_size(width, height)
+        self.path = path
+        self._shm = None
+        self._mmap = None
+
+        if path is not None:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                os.ftruncate(fd, self.size)
+                self._mmap = mmap.mmap(fd, self.size, access=mmap.ACCESS_WRITE)
+            finally:
+                os.close(fd)
+            self._buffer = memoryview(self._mmap)
+        else:
+            from multiprocessing import shared_memory
+
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=self.size)
+            self._buffer = self._shm.buf
+
+        self.name = self._shm.name if self._shm is not None else None
+        self._pixels = self._buffer[HEADER_SIZE:self.size]
+        HEADER.pack_into(self._buffer, 0, FRAMEBUFFER_MAGIC, FRAMEBUFFER_VERSION,
+                         FORMAT_RGB888, width, height, self.stride, 0, 0)
+
+    @property
+    def frame_counter(self) -> int:
+        return _FRAME.unpack_from(self._buffer, FRAME_OFFSET)[0]
+
+    def publish(self, image) -> int:
+        """
+        Публікація кадру в спільний буфер.
+
+        Args:
+            image: Зображення Pillow у режимі RGB розміром width x height
+
+        Returns:
+            int: Номер опублікованого кадру
+        """
+        if image.size != (self.width, self.height):
+            raise ValueError(f"Image size {image.size} does not match framebuffer "
+                             f"{self.width}x{self.height}")
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        seq = _SEQ.unpack_from(self._buffer, SEQ_OFFSET)[0]
+        _SEQ.pack_into(self._buffer, SEQ_OFFSET, (seq + 1) & 0xFFFFFFFF)
+        self._pixels[:] = image.tobytes()
+        frame = self.frame_counter + 1
+        _FRAME.pack_into(self._buffer, FRAME_OFFSET, frame)
+        _SEQ.pack_into(self._buffer, SEQ_OFFSET, (seq + 2) & 0xFFFFFFFF)
+        return frame
+
+    def close(self):
+        self._pixels.release()
+        if self._shm is not None:
+            self._shm.close()
+        else:
+            self._buffer.release()
+            self._mmap.close()
+
+    def unlink(self):
+        """Видалення файлу або сегмента shared memory."""
+        if self._shm is not None:
+            self._shm.unlink()
+        elif self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class SharedFramebufferReader:
+    """
+    Читач кадрового буфера з іншого процесу.
+
+    pixels повертає memoryview на пікселі без копіювання. Щоб отримати
+    узгоджений кадр, читач обгортає доступ у begin_read()/validate()
+    або використовує read_frame(), яка робить це сама.
+    """
+
+    def __init__(self, path: Optional[str] = None, name: Optional[str] = None):
+        if (path is None) == (name is None):
+            raise ValueError("Exactly one of path or name must be given")
+
+        self._shm = None
+        self._mmap = None
+        if path is not None:
+            with open(path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._buffer = memoryview(self._mmap)
+        else:
+            self._shm = _attach_shared_memory(name)
+            self._buffer = self._shm.buf
+
+        magic, version, fmt, width, height, stride, _, _ = HEADER.unpack_from(self._buffer, 0)
+        if magic != FRAMEBUFFER_MAGIC:
+            self.close()
+            raise ValueError("Not a display framebuffer segment")
+        if version != FRAMEBUFFER_VERSION or fmt != FORMAT_RGB888:
+            self.close()
+            raise ValueError(f"Unsupported framebuffer version {version} or format {fmt}")
+
+        self.width = width
+        self.height = height
+        self.stride = stride
+        self.pixels = self._buffer[HEADER_SIZE:HEADER_SIZE + stride * height]
+
+    @property
+    def frame_counter(self) -> int:
+        return _FRAME.unpack_from(self._buffer, FRAME_OFFSET)[0]
+
+    def begin_read(self, timeout: float = READ_TIMEOUT) -> int:
+        """
+        Очікування завершення запису; повертає значення seqlock.
+
+        Raises:
+            TimeoutError: Запис не завершився за timeout секунд
+        """
+        seq = _SEQ.unpack_from(self._buffer, SEQ_OFFSET)[0]
+        if not seq & 1:
+            return seq
+        deadline = time.monotonic() + timeout
+        while True:
+            # Віддаємо процесор виробнику, який саме пише кадр
+            time.sleep(0)
+            seq = _SEQ.unpack_from(self._buffer, SEQ_OFFSET)[0]
+            if not seq & 1:
+                return seq
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Framebuffer write did not finish in {timeout}s (seq {seq})")
+
+    def validate(self, seq: int) -> bool:
+        """Перевірка, що кадр не змінювався після begin_read()."""
+        return _SEQ.unpack_from(self._buffer, SEQ_OFFSET)[0] == seq
+
+    def read_frame(self, out: Optional[bytearray] = None,
+                   timeout: float = READ_TIMEOUT) -> Tuple[int, bytearray]:
+        """
+        Копіювання узгодженого кадру.
+
+        Args:
+            out: Буфер для повторного використання між викликами
+            timeout: Скільки секунд чекати на узгоджений кадр
+
+        Returns:
+            Tuple[int, bytearray]: Номер кадру та пікселі RGB888
+
+        Raises:
+            TimeoutError: Узгоджений кадр не вдалося прочитати за timeout секунд
+        """
+        if out is None:
+            out = bytearray(len(self.pixels))
+        deadline = time.monotonic() + timeout
+        while True:
+            seq = self.begin_read(max(deadline - time.monotonic(), 0.0))
+            frame = self.frame_counter
+            out[:] = self.pixels
+            if self.validate(seq):
+                return frame, out
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"No consistent framebuffer frame in {timeout}s")
+            time.sleep(0)
+
+    def close(self):
+        if hasattr(self, 'pixels'):
+            self.pixels.release()
+        if self._shm is not None:
+            self._shm.close()
+        else:
+            self._buffer.release()
+            self._mmap.close()
@@ -0,0 +1,151 @@
+import logging
+import random
+import struct
+import unittest
+from batch_parser import BatchCommandParser, encode_stream
+from command_parser import DisplayCommandParser
+
+
+def setUpModule():
+    logging.disable(logging.CRITICAL)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+def random_commands(count, seed=1):
+    rng = random.Random(seed)
+    commands = []
+    for _ in range(count):
+        command_id = rng.randint(0x01, 0x0C)
+        color = rng.randint(0, 0xFFFF)
+        coords = [rng.randint(-2000, 2000) for _ in range(2)]
+        extent = [rng.randint(0, 2000) for _ in range(2)]
+        if command_id == 0x01:
+            command = struct.pack(">BH", command_id, color)
+        elif command_id == 0x02:
+            command = struct.pack(">BhhH", command_id, *coords, color)
+        elif command_id == 0x03:
+            command = struct.pack(">BhhhhH", command_id, *coords, *coords[::-1], color)
+        elif command_id in (0x04, 0x05, 0x06, 0x07):
+            command = struct.pack(">BhhhhH", command_id, *coords, *extent, color)
+        elif command_id in (0x08, 0x09):
+            command = struct.pack(">BhhHH", command_id, *coords, extent[0], color)
+        elif command_id in (0x0A, 0x0B):
+            command = struct.pack(">BhhhhHH", command_id, *coords, *extent, 10, color)
+        else:
+            text = rng.choice(["Hello", "", "Привіт"]).encode('utf-8')
+            command = struct.pack(">BhhHBB", command_id, *coords, color, 1, len(text)) + text
+        commands.append(command)
+    return commands
+
+
+class TestBatchCommandParser(unittest.TestCase):
+    def setUp(self):
+        self.batch_parser = BatchCommandParser()
+
+    def test_matches_scalar_parser(self):
+        commands = random_commands(500)
+        commands += [
+            bytes([0xFF, 0x00, 0x00]),
+            bytes([0x01, 0x00]),
+            bytes([0x05, 0x00, 0x0F, 0x00, 0x19, 0xFF, 0xB0, 0x00, 0x3C, 0xF8, 0x00]),
+            bytes([0x0C, 0x00, 0x32, 0x00, 0x64, 0xF8, 0x00, 0x01, 0x05, 0x48]),
+            bytes([0x0D]),
+        ]
+        scalar = DisplayCommandParser()
+        expected = [r for r in map(scalar.parse, commands) if r is not None]
+
+        batch = self.batch_parser.parse_datagrams(commands)
+        self.assertEqual(batch.to_dicts(), expected)
+        self.assertEqual(len(batch), len(expected))
+        self.assertEqual(batch.rejections, scalar.rejections.counters)
+
+    def test_stream_matches_datagrams(self):
+        commands = random_commands(200, seed=2)
+        from_stream = self.batch_parser.parse_stream(encode_stream(commands))
+        from_datagrams = self.batch_parser.parse_datagrams(commands)
+        self.assertEqual(from_stream.to_dicts(), from_datagrams.to_dicts())
+
+    def test_long_stream_matches_sequential_split(self):
+        # Довгий потік розбирається по ділянках; пошкоджені записи, довгий
+        # текст на межі ділянки та обрізаний кінець мають розбиратися так
+        # само, як при послідовному проході
+        commands = random_commands(20000, seed=5)
+        commands[3000] = bytes([0x0C]) + bytes(40000)
+        stream = bytearray(encode_stream(commands))
+        rng = random.Random(6)
+        for _ in range(20):
+            position = rng.randrange(len(stream) - 2)
+            stream[position:position + 2] = rng.randbytes(2)
+        stream = bytes(stream[:-3])
+
+        records = []
+        position = 0
+        while position + 2 <= len(stream):
+            length = struct.unpack_from(">H", stream, position)[0]
+            records.append(stream[position + 2:position + 2 + length])
+            position += 2 + length
+        if position > len(stream):
+            records.pop()
+
+        from_stream = self.batch_parser.parse_stream(stream)
+        from_records = self.batch_parser.parse_datagrams(records)
+        self.assertEqual(from_stream.to_dicts(), from_records.to_dicts())
+        self.assertEqual(from_stream.rejections['bad_length'], from_records.rejections['bad_length'] + 1)
+
+    def test_fixed_commands_are_arrays(self):
+        commands = [bytes([0x02, 0x00, 0x64, 0x00, 0xC8, 0x07, 0xE0])] * 3
+        batch = self.batch_parser.parse_datagrams(commands)
+        pixels = batch.arrays[0x02]
+        self.assertEqual(pixels['index'].tolist(), [0, 1, 2])
+        self.assertEqual(pixels['x'].tolist(), [100] * 3)
+        self.assertEqual(pixels['y'].tolist(), [200] * 3)
+        self.assertEqual(pixels['color'].tolist(), [0x07E0] * 3)
+
+    def test_viewport_batch_matches_scalar_rendering(self):
+        from display_drawer import DisplayDrawer
+
+        rng = random.Random(3)
+        commands = []
+        for command in random_commands(300, seed=4):
+            if rng.random() < 0.05:
+                commands.append(struct.pack(">BhhhhHH", 0x0F, rng.randint(-50, 50), rng.randint(-50, 50),
+                                            rng.randint(100, 400), rng.randint(100, 300),
+                                            rng.choice([0, 160, 640, 2000]), rng.choice([0, 120, 480, 2000])))
+            elif rng.random() < 0.05:
+                commands.append(struct.pack(">Bhhhh", 0x0E, rng.randint(-100, 300), rng.randint(-100, 200),
+                                            rng.randint(0, 300), rng.randint(0, 200)))
+            commands.append(command)
+
+        scalar_parser = DisplayCommandParser()
+        scalar = DisplayDrawer(320, 240)
+        for command in commands:
+            result = scalar_parser.parse(command)
+            if result is not None:
+                scalar.render(result)
+
+        batched = DisplayDrawer(320, 240)
+        batch = self.batch_parser.parse_datagrams(commands)
+        batched.render_batch(batch)
+
+        self.assertEqual(batched.get_image().tobytes(), scalar.get_image().tobytes())
+        self.assertEqual(vars(batched.viewport), vars(scalar.viewport))
+        self.assertEqual(batched.clip, scalar.clip)
+
+    def test_apply_viewport_without_changes_is_a_no_op(self):
+        batch = self.batch_parser.parse_datagrams(random_commands(20))
+        transformed, viewport = batch.apply_viewport()
+        self.assertIs(transformed, batch)
+        self.assertTrue(viewport.identity)
+
+    def test_truncated_stream(self):
+        stream = encode_stream([bytes([0x01, 0xFF, 0xFF])] * 2)
+        batch = self.batch_parser.parse_stream(stream[:-1])
+        self.assertEqual(len(batch), 1)
+        self.assertEqual(batch.rejections['bad_length'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from unittest import mock
+from display_drawer import DisplayDrawer
+
+
+class TestDisplayDrawer(unittest.TestCase):
+    def test_single_buffered_draws_to_visible_image(self):
+        drawer = DisplayDrawer(16, 16)
+        drawer.draw_pixel(3, 4, 0xFFFF)
+        self.assertEqual(drawer.get_image().getpixel((3, 4)), (255, 255, 255))
+
+    def test_double_buffered_shows_frame_only_after_swap(self):
+        drawer = DisplayDrawer(16, 16, double_buffered=True)
+        front = drawer.get_image()
+        drawer.draw_pixel(3, 4, 0xF800)
+        self.assertEqual(drawer.get_image().getpixel((3, 4)), (0, 0, 0))
+
+        drawer.swap_buffers()
+        self.assertEqual(drawer.get_image().getpixel((3, 4)), (255, 0, 0))
+        # Обмін без копіювання: колишній передній буфер став заднім
+        self.assertIs(drawer.image, front)
+
+    def test_font_loaded_on_first_text(self):
+        drawer = DisplayDrawer(64, 16)
+        self.assertIsNone(drawer._font)
+        drawer.draw_text(0, 0, "Hi", 0xFFFF)
+        self.assertIsNotNone(drawer._font)
+
+    def test_render_reports_visible_change(self):
+        drawer = DisplayDrawer(16, 16, double_buffered=True)
+        self.assertFalse(drawer.render({'command_id': 0x02, 'x': 1, 'y': 1, 'color': 0xFFFF}))
+        self.assertTrue(drawer.render({'command_id': 0x0D}))
+        self.assertEqual(drawer.get_image().getpixel((1, 1)), (255, 255, 255))
+
+    def test_clip_restricts_drawing(self):
+        drawer = DisplayDrawer(32, 32)
+        self.assertFalse(drawer.render({'command_id': 0x0E, 'x0': 8, 'y0': 8, 'w': 8, 'h': 8}))
+        drawer.draw_rectangle(0, 0, 31, 31, 0xFFFF, filled=True)
+        drawer.draw_line(0, 20, 31, 20, 0xFFFF)
+        drawer.draw_ellipse(4, 4, 16, 16, 0xFFFF, filled=True)
+        drawer.draw_text(10, 0, "Hello", 0xFFFF)
+        bbox = drawer.get_image().getbbox()
+        self.assertEqual(bbox, (8, 8, 16, 16))
+
+        drawer.set_clip(0, 0, 0, 0)
+        self.assertEqual(drawer.clip, drawer.surface)
+
+    def test_culled_shapes_do_not_reach_pillow(self):
+        drawer = DisplayDrawer(32, 32)
+        drawer.set_clip(0, 0, 8, 8)
+        drawer.draw = mock.Mock()
+        drawer.image = mock.Mock()
+        drawer.draw_line(20, 20, 30, 30, 0xFFFF)
+        drawer.draw_text(20, 20, "Hi", 0xFFFF)
+        drawer.draw_ellipse(100, 100, 10, 10, 0xFFFF)
+        drawer.draw_rounded_rectangle(-100, 0, 50, 50, 5, 0xFFFF, filled=True)
+        self.assertEqual(drawer.draw.mock_calls, [])
+        self.assertEqual(drawer.image.mock_calls, [])
+
+    def test_empty_clip_draws_nothing(self):
+        drawer = DisplayDrawer(32, 32)
+        drawer.set_clip(40, 40, 10, 10)
+        drawer.draw_rectangle(0, 0, 31, 31, 0xFFFF, filled=True)
+        drawer.draw_pixel(45, 45, 0xFFFF)
+        self.assertIsNone(drawer.get_image().getbbox())
+
+    def test_viewport_scales_logical_coordinates(self):
+        drawer = DisplayDrawer(64, 64)
+        self.assertFalse(drawer.render({'command_id': 0x0F, 'x0': 0, 'y0': 0, 'w': 64, 'h': 64,
+                                        'logical_w': 16, 'logical_h': 16}))
+        drawer.render({'command_id': 0x05, 'x0': 2, 'y0': 3, 'w': 4, 'h': 2, 'color': 0xFFFF})
+        self.assertEqual(drawer.get_image().getbbox(), (8, 12, 25, 21))
+
+        # Нульова логічна ширина скидає перетворення
+        drawer.render({'command_id': 0x0F, 'x0': 0, 'y0': 0, 'w': 0, 'h': 0,
+                       'logical_w': 0, 'logical_h': 0})
+        self.assertTrue(drawer.viewport.identity)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import logging
+import socket
+import time
+import unittest
+from unittest import mock
+from feedback import FEEDBACK, FEEDBACK_MAGIC, FEEDBACK_SUBSCRIBE, UNKNOWN, Feedback, PacedSender, ServerStats
+from udp_server import UDPServer
+
+
+def setUpModule():
+    logging.disable(logging.CRITICAL)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+def feedback(backlog, kernel_drops=0):
+    return Feedback.parse(FEEDBACK.pack(FEEDBACK_MAGIC, backlog, 0, 0, kernel_drops, 0, 0, 0, 0))
+
+
+class TestServerStats(unittest.TestCase):
+    def test_pending_render(self):
+        stats = ServerStats()
+        stats.dispatched = 5
+        self.assertEqual(stats.pending_render, 0, "Untracked consumers report no render queue")
+        stats.command_done(time.monotonic())
+        self.assertEqual(stats.pending_render, 4)
+        self.assertEqual(stats.rendered, 1)
+
+    def test_encode(self):
+        stats = ServerStats()
+        stats.on_received(11)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.bind(('127.0.0.1', 0))
+            parsed = Feedback.parse(stats.encode(sock, rejected=3))
+        self.assertEqual(parsed.received, 1)
+        self.assertEqual(parsed.rejected, 3)
+        self.assertEqual(parsed.backlog, 0)
+
+
+class TestPacedSender(unittest.TestCase):
+    def setUp(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sender = PacedSender(self.sock, ('127.0.0.1', 9), rate=1000.0, target_backlog=32)
+
+    def tearDown(self):
+        self.sock.close()
+
+    def test_rate_grows_below_target(self):
+        self.sender._adapt(feedback(0))
+        self.assertGreater(self.sender.rate, 1000.0)
+
+    def test_rate_drops_above_target(self):
+        self.sender._adapt(feedback(128))
+        self.assertLess(self.sender.rate, 1000.0)
+
+    def test_rate_halves_on_kernel_drops(self):
+        self.sender._adapt(feedback(0, kernel_drops=10))
+        rate = self.sender.rate
+        self.sender._adapt(feedback(0, kernel_drops=20))
+        self.assertAlmostEqual(self.sender.rate, rate / 2)
+
+    def test_unknown_drops_are_ignored(self):
+        self.sender._adapt(feedback(0, kernel_drops=UNKNOWN))
+        self.assertIsNone(self.sender.feedback.kernel_drops)
+
+
+class TestServerFeedback(unittest.TestCase):
+    def test_subscriber_receives_feedback(self):
+        server = UDPServer('127.0.0.1', 0, lambda command: None)
+        server.start()
+        self.assertTrue(server.ready.wait(2))
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.settimeout(2)
+        try:
+            sock.sendto(bytes([FEEDBACK_SUBSCRIBE]), ('127.0.0.1', server.port))
+            sock.sendto(bytes([0x01, 0x00, 0x00]), ('127.0.0.1', server.port))
+            parsed = None
+            while parsed is None or parsed.received < 2:
+                parsed = Feedback.parse(sock.recvfrom(64)[0])
+            self.assertEqual(parsed.rejected, 0)
+        finally:
+            sock.close()
+            server.stop()
+
+    def test_callback_gets_parsed_command_with_receive_time(self):
+        received = []
+        server = UDPServer('127.0.0.1', 0, received.append)
+        self.assertTrue(server._dispatch(bytes([0x01, 0x00, 0x1F]), 12.5))
+        self.assertEqual(received, [{'color': 0x1F, 'command_id': 0x01, 'received_at': 12.5}])
+
+    def test_subscriber_table_is_capped(self):
+        server = UDPServer('127.0.0.1', 0, lambda command: None, max_subscribers=4)
+        for port in range(10):
+            server._subscribe(('10.0.0.1', port), time.monotonic())
+        self.assertEqual(list(server.subscribers), [('10.0.0.1', port) for port in range(6, 10)])
+
+    def test_feedback_requires_commands_from_subscriber(self):
+        server = UDPServer('127.0.0.1', 0, lambda command: None)
+        subscriber = ('127.0.0.1', 9)
+        server._subscribe(subscriber, time.monotonic())
+        sock = mock.Mock()
+        with mock.patch('feedback.read_socket_stats', return_value=(None, None)):
+            server._publish_feedback(sock)
+            sock.sendto.assert_not_called()
+
+            # Одна команда - один пакет зворотного зв'язку
+            server.subscribers[subscriber][1] = True
+            for _ in range(3):
+                server._last_feedback = 0.0
+                server._publish_feedback(sock)
+            sock.sendto.assert_called_once()
+            self.assertEqual(sock.sendto.call_args[0][1], subscriber)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import logging
+import unittest
+from unittest import mock
+from display_drawer import DisplayDrawer
+from frame_hash import FrameHasher
+from headless import HeadlessEmulator
+from test_rendering import random_commands
+
+
+def setUpModule():
+    logging.disable(logging.CRITICAL)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+def full_hash(image):
+    hasher = FrameHasher(*image.size)
+    return hasher.update(image)
+
+
+class TestFrameHasher(unittest.TestCase):
+    def test_only_dirty_tiles_are_rehashed(self):
+        drawer = DisplayDrawer(256, 128)
+        drawer.frame_hash()
+        hashed = drawer._front_hasher.tiles_hashed
+        self.assertEqual(hashed, 8)
+
+        drawer.draw_rectangle(10, 10, 20, 20, 0xFFFF, filled=True)
+        drawer.frame_hash()
+        self.assertEqual(drawer._front_hasher.tiles_hashed - hashed, 1)
+
+        # Без змін хеш не перераховується
+        drawer.frame_hash()
+        self.assertEqual(drawer._front_hasher.tiles_hashed - hashed, 1)
+
+    def test_clear_does_not_rehash_tiles(self):
+        drawer = DisplayDrawer(200, 100)
+        drawer.draw_rectangle(0, 0, 200, 100, 0x07E0, filled=True)
+        drawer.frame_hash()
+        hashed = drawer._front_hasher.tiles_hashed
+
+        drawer.clear_display()
+        drawer.draw_pixel(150, 90, 0xFFFF)
+        self.assertEqual(drawer.frame_hash(), full_hash(drawer.get_image()))
+        self.assertEqual(drawer._front_hasher.tiles_hashed - hashed, 1)
+
+    def test_incremental_hash_matches_full_hash(self):
+        drawer = DisplayDrawer(320, 240)
+        for i, command in enumerate(random_commands(5, count=200)):
+            drawer.render(command)
+            if i % 20 == 0:
+                self.assertEqual(drawer.frame_hash(), full_hash(drawer.get_image()))
+        self.assertEqual(drawer.frame_hash(), full_hash(drawer.get_image()))
+
+    def test_same_content_same_hash(self):
+        first = DisplayDrawer(128, 128)
+        first.draw_rectangle(0, 0, 50, 50, 0xF800, filled=True)
+        first.draw_rectangle(20, 20, 10, 10, 0x07E0, filled=True)
+
+        second = DisplayDrawer(128, 128)
+        second.draw_pixel(100, 100, 0xFFFF)
+        second.clear_display()
+        second.draw_rectangle(0, 0, 50, 50, 0xF800, filled=True)
+        second.draw_rectangle(20, 20, 10, 10, 0x07E0, filled=True)
+
+        self.assertEqual(first.frame_hash(), second.frame_hash())
+        self.assertEqual(first.tile_hashes(), second.tile_hashes())
+
+        second.draw_pixel(127, 127, 0x0001)
+        self.assertNotEqual(first.frame_hash(), second.frame_hash())
+        self.assertEqual(first.tile_hashes()[:3], second.tile_hashes()[:3])
+
+    def test_double_buffered_hash_follows_front_buffer(self):
+        drawer = DisplayDrawer(64, 64, double_buffered=True)
+        empty = drawer.frame_hash()
+        drawer.draw_pixel(1, 1, 0xFFFF)
+        self.assertEqual(drawer.frame_hash(), empty)
+
+        drawer.swap_buffers()
+        self.assertNotEqual(drawer.frame_hash(), empty)
+        self.assertEqual(drawer.frame_hash(), full_hash(drawer.get_image()))
+
+        drawer.swap_buffers()
+        self.assertEqual(drawer.frame_hash(), empty)
+
+
+class TestDuplicateFrames(unittest.TestCase):
+    def test_unchanged_frame_is_not_published(self):
+        framebuffer = mock.Mock()
+        emulator = HeadlessEmulator(64, 64, port=0, shared_framebuffer=framebuffer, double_buffered=True)
+        for _ in range(3):
+            emulator.process_command({'command_id': 0x01, 'color': 0})
+            emulator.process_command({'command_id': 0x05, 'x0': 5, 'y0': 5, 'w': 10, 'h': 10, 'color': 0xF800})
+            emulator.process_command({'command_id': 0x0D})
+
+        self.assertEqual(emulator.frames_presented, 3)
+        self.assertEqual(emulator.frames_skipped, 2)
+        self.assertEqual(framebuffer.publish.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
+import time
 import unittest
 import logging
-from command_parser import DisplayCommandParser
+from command_parser import DisplayCommandParser, RejectionCounter, validate_packet
+from udp_server import UDPServer
 
 class TestDisplayCommandParser(unittest.TestCase):
     def setUp(self):
@@ -193,6 +195,29 @@ class TestDisplayCommandParser(unittest.TestCase):
         result = self.parser.parse(command)
         self.assertIsNone(result, "Parse result should be None for invalid number of parameters")
 
+    def test_present(self):
+        result = self.parser.parse(bytes([0x0D]))
+        self.assertEqual(result, {'command_id': 0x0D})
+
+    def test_present_with_params(self):
+        result = self.parser.parse(bytes([0x0D, 0x00]))
+        self.assertIsNone(result, "Present takes no parameters")
+
+    def test_set_clip(self):
+        command = bytes([0x0E, 0xFF, 0xF6, 0x00, 0x14, 0x00, 0x64, 0x00, 0x32])
+        result = self.parser.parse(command)
+        self.assertEqual(result, {'command_id': 0x0E, 'x0': -10, 'y0': 20, 'w': 100, 'h': 50})
+
+    def test_set_viewport(self):
+        command = bytes([0x0F, 0x00, 0x0A, 0x00, 0x14, 0x04, 0x00, 0x03, 0x00, 0x01, 0x40, 0x00, 0xF0])
+        result = self.parser.parse(command)
+        self.assertEqual(result, {'command_id': 0x0F, 'x0': 10, 'y0': 20, 'w': 1024, 'h': 768,
+                                  'logical_w': 320, 'logical_h': 240})
+
+    def test_negative_clip_size(self):
+        command = bytes([0x0E, 0x00, 0x00, 0x00, 0x00, 0xFF, 0x9C, 0x00, 0x32])
+        self.assertEqual(validate_packet(command), 'out_of_range')
+
     def test_invalid_command(self):
         command = bytes([0xFF, 0x00, 0x00])  
         result = self.parser.parse(command)
@@ -203,5 +228,55 @@ class TestDisplayCommandParser(unittest.TestCase):
         result = self.parser.parse(command)
         self.assertIsNone(result)
 
+    def test_negative_rectangle_width(self):
+        command = bytes([0x05, 0x00, 0x0F, 0x00, 0x19, 0xFF, 0xB0, 0x00, 0x3C, 0xF8, 0x00])
+        self.assertEqual(validate_packet(command), 'out_of_range')
+        self.assertIsNone(self.parser.parse(command))
+
+    def test_draw_text_truncated(self):
+        command = bytes([0x0C, 0x00, 0x32, 0x00, 0x64, 0xF8, 0x00, 0x01, 0x05, 0x48, 0x65])
+        self.assertEqual(validate_packet(command), 'bad_text_length')
+        self.assertIsNone(self.parser.parse(command))
+
+    def test_rejection_counters(self):
+        self.parser.parse(bytes([0xFF, 0x00, 0x00]))
+        self.parser.parse(bytes([0xFE]))
+        self.parser.parse(bytes([0x01, 0x00]))
+        self.assertEqual(self.parser.rejections.counters['unknown_command'], 2)
+        self.assertEqual(self.parser.rejections.counters['bad_length'], 1)
+
+    def test_empty_packet_is_counted_as_bad_length(self):
+        self.assertIsNone(self.parser.parse(b''))
+        self.assertEqual(self.parser.rejections.counters['bad_length'], 1)
+
+    def test_server_counts_empty_datagrams_without_error_log(self):
+        server = UDPServer('127.0.0.1', 0, lambda command: None)
+        with self.assertNoLogs(server.logger, level='ERROR'):
+            self.assertIsNone(server.validate_and_parse_packet(b''))
+        self.assertEqual(server.command_parser.rejections.counters['bad_length'], 1)
+
+    def test_rejections_are_reported_in_aggregate(self):
+        logger = logging.getLogger('test_rejections')
+        counter = RejectionCounter(logger, interval=3600)
+        with self.assertLogs(logger, level='WARNING') as logs:
+            for _ in range(100):
+                counter.record('bad_length')
+            counter.flush()
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn("99 packet(s)", logs.output[1])
+
+    def test_last_window_is_reported_when_flood_stops(self):
+        logger = logging.getLogger('test_rejections')
+        counter = RejectionCounter(logger, interval=3600)
+        with self.assertLogs(logger, level='WARNING') as logs:
+            for _ in range(10):
+                counter.record('bad_length')
+            counter.flush_if_due()
+            self.assertEqual(len(logs.records), 1)
+            counter.flush_if_due(time.monotonic() + 3600)
+            counter.flush_if_due(time.monotonic() + 7200)
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn("9 packet(s)", logs.output[1])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
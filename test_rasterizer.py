@@ -0,0 +1,101 @@
+import unittest
+from PIL import Image, ImageDraw
+from display_drawer import DisplayDrawer
+from rasterizer import ellipse_boxes, rounded_rectangle_boxes
+
+WIDTH, HEIGHT = 200, 150
+CLIP = (0, 0, WIDTH - 1, HEIGHT - 1)
+
+
+def render_boxes(boxes):
+    image = Image.new('L', (WIDTH, HEIGHT))
+    for xa, ya, xb, yb in boxes:
+        image.paste(255, (xa, ya, xb + 1, yb + 1))
+    return image
+
+
+def pixel_difference(a, b):
+    return sum(1 for pa, pb in zip(a.tobytes(), b.tobytes()) if pa != pb)
+
+
+class TestRasterizer(unittest.TestCase):
+    def assertMatchesPillow(self, ours, reference):
+        self.assertEqual(pixel_difference(ours, reference), 0)
+
+    def test_ellipse_matches_pillow(self):
+        boxes = [(10, 10, 60, 40), (20, 30, 120, 130), (-50, -50, 100, 100), (5, 5, 6, 9),
+                 (30, 20, 30, 90), (30, 20, 170, 20), (40, 40, 40, 40), (-400, 60, 600, 1000)]
+        for box in boxes:
+            for filled in (True, False):
+                with self.subTest(box=box, filled=filled):
+                    reference = Image.new('L', (WIDTH, HEIGHT))
+                    if filled:
+                        ImageDraw.Draw(reference).ellipse(box, fill=255)
+                    else:
+                        ImageDraw.Draw(reference).ellipse(box, outline=255, width=2)
+                    ours = render_boxes(ellipse_boxes(*box, CLIP, filled))
+                    self.assertMatchesPillow(ours, reference)
+
+    def test_rounded_rectangle_matches_pillow(self):
+        cases = [((10, 10, 60, 40), 10), ((20, 30, 120, 130), 10), ((-50, -50, 100, 100), 10),
+                 ((20, 10, 180, 140), 35), ((20, 10, 180, 140), 80), ((10, 20, 190, 60), 19),
+                 ((30, 20, 30, 90), 5), ((30, 20, 170, 20), 5), ((30, 20, 170, 20), 0),
+                 ((30, 20, 31, 90), 5), ((10, 10, 110, 60), 0), ((-300, 40, 500, 2000), 600)]
+        for box, radius in cases:
+            for filled in (True, False):
+                with self.subTest(box=box, radius=radius, filled=filled):
+                    reference = Image.new('L', (WIDTH, HEIGHT))
+                    if filled:
+                        ImageDraw.Draw(reference).rounded_rectangle(box, radius=radius, fill=255)
+                    else:
+                        ImageDraw.Draw(reference).rounded_rectangle(box, radius=radius, outline=255, width=2)
+                    ours = render_boxes(rounded_rectangle_boxes(*box, radius, CLIP, filled))
+                    self.assertMatchesPillow(ours, reference)
+
+    def test_huge_ellipse_matches_pillow(self):
+        for box in [(-32000, -32000, 32000, 32000), (-32000, 100, 32000, 20000), (-5000, -31000, 190, 140)]:
+            for filled in (True, False):
+                with self.subTest(box=box, filled=filled):
+                    reference = Image.new('L', (WIDTH, HEIGHT))
+                    if filled:
+                        ImageDraw.Draw(reference).ellipse(box, fill=255)
+                    else:
+                        ImageDraw.Draw(reference).ellipse(box, outline=255, width=2)
+                    ours = render_boxes(ellipse_boxes(*box, CLIP, filled))
+                    self.assertMatchesPillow(ours, reference)
+
+    def test_drawer_paths_agree(self):
+        # Та сама фігура однаково виглядає з обох боків порогу mostly_clipped
+        for x0 in (-150, -20):
+            for filled in (True, False):
+                with self.subTest(x0=x0, filled=filled):
+                    drawer = DisplayDrawer(WIDTH, HEIGHT)
+                    drawer.draw_ellipse(x0, 20, 160, 100, 0xFFFF, filled)
+                    drawer.draw_rounded_rectangle(x0, 30, 160, 0, 8, 0xFFFF, filled)
+                    reference = Image.new('RGB', (WIDTH, HEIGHT))
+                    draw = ImageDraw.Draw(reference)
+                    if filled:
+                        draw.ellipse((x0, 20, x0 + 160, 120), fill='white')
+                        draw.rounded_rectangle((x0, 30, x0 + 160, 30), radius=8, fill='white')
+                    else:
+                        draw.ellipse((x0, 20, x0 + 160, 120), outline='white', width=2)
+                        draw.rounded_rectangle((x0, 30, x0 + 160, 30), radius=8, outline='white', width=2)
+                    self.assertEqual(drawer.get_image().tobytes(), reference.tobytes())
+
+    def test_offscreen_shapes_produce_nothing(self):
+        self.assertEqual(list(ellipse_boxes(-30000, -30000, -20000, -20000, CLIP, True)), [])
+        self.assertEqual(list(rounded_rectangle_boxes(300, 10, 400, 50, 5, CLIP, True)), [])
+
+    def test_negative_extent_produces_nothing(self):
+        self.assertEqual(list(ellipse_boxes(50, 50, 10, 60, CLIP, True)), [])
+
+    def test_huge_shape_is_clipped(self):
+        boxes = list(ellipse_boxes(-32000, -32000, 32000, 32000, CLIP, True))
+        self.assertEqual(boxes, [(0, 0, WIDTH - 1, HEIGHT - 1)])
+
+        for xa, ya, xb, yb in ellipse_boxes(-32000, 100, 32000, 20000, CLIP, False):
+            self.assertTrue(0 <= xa <= xb < WIDTH and 0 <= ya <= yb < HEIGHT)
+
+
+if __name__ == '__main__':
+    unittest.main()
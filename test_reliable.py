@@ -0,0 +1,210 @@
+import logging
+import socket
+import threading
+import unittest
+from unittest import mock
+from reliable import ACK, ACK_MAGIC, ENVELOPE, RELIABLE_MAGIC, ReliableReceiver, ReliableSender
+from udp_server import UDPServer
+
+
+def setUpModule():
+    logging.disable(logging.CRITICAL)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+ADDR = ('127.0.0.1', 40000)
+
+
+def envelope(session_id, seq, payload, base=0):
+    return ENVELOPE.pack(RELIABLE_MAGIC, session_id, seq, base) + payload
+
+
+class TestReliableReceiver(unittest.TestCase):
+    def setUp(self):
+        self.receiver = ReliableReceiver()
+
+    def test_in_order_delivery(self):
+        delivered, ack = self.receiver.receive(envelope(7, 0, b'a'), ADDR)
+        self.assertEqual(delivered, [b'a'])
+        self.assertEqual(ACK.unpack(ack)[2:], (1, 0))
+
+    def test_out_of_order_is_buffered(self):
+        delivered, ack = self.receiver.receive(envelope(7, 2, b'c'), ADDR)
+        self.assertEqual(delivered, [])
+        self.assertEqual(ACK.unpack(ack)[2:], (0, 0b10))
+
+        delivered, _ = self.receiver.receive(envelope(7, 1, b'b'), ADDR)
+        self.assertEqual(delivered, [])
+        delivered, ack = self.receiver.receive(envelope(7, 0, b'a'), ADDR)
+        self.assertEqual(delivered, [b'a', b'b', b'c'])
+        self.assertEqual(ACK.unpack(ack)[2:], (3, 0))
+
+    def test_duplicates_are_suppressed(self):
+        self.receiver.receive(envelope(7, 0, b'a'), ADDR)
+        delivered, ack = self.receiver.receive(envelope(7, 0, b'a'), ADDR)
+        self.assertEqual(delivered, [])
+        self.assertIsNotNone(ack)
+        self.assertEqual(self.receiver.duplicates, 1)
+
+    def test_new_session_resets_sequence(self):
+        self.receiver.receive(envelope(7, 0, b'a'), ADDR)
+        delivered, _ = self.receiver.receive(envelope(8, 0, b'x'), ADDR)
+        self.assertEqual(delivered, [b'x'])
+
+    def test_restarted_server_syncs_to_sender_base(self):
+        # Після перезапуску сервера відправник уже має підтвердженими пакети 0..4
+        delivered, ack = self.receiver.receive(envelope(7, 6, b'g', base=5), ADDR, now=0.0)
+        self.assertEqual(delivered, [])
+        self.assertEqual(ACK.unpack(ack)[2:], (5, 0b1))
+        delivered, ack = self.receiver.receive(envelope(7, 5, b'f', base=5), ADDR, now=0.0)
+        self.assertEqual(delivered, [b'f', b'g'])
+        self.assertEqual(ACK.unpack(ack)[2:], (7, 0))
+
+    def test_foreign_envelope_does_not_replace_active_session(self):
+        self.receiver.receive(envelope(7, 0, b'a'), ADDR, now=0.0)
+        delivered, ack = self.receiver.receive(envelope(9, 100, b'x', base=100), ADDR, now=1.0)
+        self.assertEqual((delivered, ack), ([], None))
+        self.assertEqual(self.receiver.foreign_sessions, 1)
+
+        delivered, _ = self.receiver.receive(envelope(7, 1, b'b'), ADDR, now=2.0)
+        self.assertEqual(delivered, [b'b'])
+
+    def test_idle_session_is_replaced_mid_stream(self):
+        self.receiver.receive(envelope(7, 0, b'a'), ADDR, now=0.0)
+        delivered, ack = self.receiver.receive(envelope(9, 100, b'x', base=100), ADDR,
+                                               now=self.receiver.session_ttl + 1)
+        self.assertEqual(delivered, [b'x'])
+        self.assertEqual(ACK.unpack(ack)[1:3], (9, 101))
+
+
+class TestReliableSender(unittest.TestCase):
+    def setUp(self):
+        # Сокет, що нічого не читає: сервер «недосяжний», але без ICMP-помилок
+        self.peer = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.peer.bind(('127.0.0.1', 0))
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def tearDown(self):
+        self.sock.close()
+        self.peer.close()
+
+    def test_full_window_times_out(self):
+        sender = ReliableSender(self.sock, self.peer.getsockname(), window=4, rto=0.01, timeout=0.1)
+        for color in range(4):
+            sender.send(bytes([0x01, 0x00, color]))
+        with self.assertRaises(TimeoutError):
+            sender.send(bytes([0x01, 0x00, 0x04]))
+        self.assertEqual(len(sender.unacked), 4)
+
+    def test_retransmissions_stop_after_limit(self):
+        sender = ReliableSender(self.sock, self.peer.getsockname(), window=2, rto=0.01,
+                                timeout=10, max_retransmits=3)
+        sender.send(bytes([0x01, 0x00, 0x00]))
+        sender.send(bytes([0x01, 0x00, 0x01]))
+        with self.assertRaises(TimeoutError):
+            sender.send(bytes([0x01, 0x00, 0x02]))
+        self.assertTrue(sender.gave_up)
+        self.assertEqual(sender.retransmissions, 6)
+        self.assertFalse(sender.flush(0.05))
+        self.assertEqual(sender.retransmissions, 6)
+
+    def test_retransmission_carries_current_base(self):
+        sender = ReliableSender(self.sock, self.peer.getsockname(), rto=60)
+        sender.sock = mock.Mock()
+        sender.sock.recvfrom.side_effect = BlockingIOError
+        for color in range(3):
+            sender.send(bytes([0x01, 0x00, color]))
+        sent = [ENVELOPE.unpack_from(call.args[0])[2:] for call in sender.sock.sendto.call_args_list]
+        self.assertEqual(sent, [(0, 0), (1, 0), (2, 0)])
+
+        sender.sock.reset_mock()
+        sender.process_ack(ACK.pack(ACK_MAGIC, sender.session_id, 2, 0))
+        sender.rto = 0.0
+        sender._retransmit_expired()
+        self.assertEqual(ENVELOPE.unpack_from(sender.sock.sendto.call_args.args[0])[2:], (2, 2))
+
+    def test_sender_survives_server_restart(self):
+        sender = ReliableSender(self.sock, self.peer.getsockname(), rto=60)
+        sender.sock = mock.Mock()
+        sender.sock.recvfrom.side_effect = BlockingIOError
+        first = ReliableReceiver()
+        for color in range(3):
+            sender.send(bytes([0x01, 0x00, color]))
+            _, ack = first.receive(sender.sock.sendto.call_args.args[0], ADDR)
+            sender.process_ack(ack)
+        sender.send(bytes([0x01, 0x00, 0x03]))
+
+        # Новий сервер нічого не знає про сесію, але не чекає пакетів 0..2
+        restarted = ReliableReceiver()
+        sender.rto = 0.0
+        sender._retransmit_expired()
+        delivered, ack = restarted.receive(sender.sock.sendto.call_args.args[0], ADDR)
+        self.assertEqual(delivered, [bytes([0x01, 0x00, 0x03])])
+        sender.process_ack(ack)
+        self.assertEqual(len(sender.unacked), 0)
+
+
+class TestEnvelopeHandling(unittest.TestCase):
+    def test_failed_ack_does_not_drop_commands(self):
+        received = []
+        server = UDPServer('127.0.0.1', 0, lambda command: received.append(command['color']))
+        s = mock.Mock()
+        s.sendto.side_effect = socket.timeout("send buffer full")
+
+        server._handle_envelope(s, envelope(7, 1, bytes([0x01, 0x00, 0x02])), ADDR, 0.0)
+        server._handle_envelope(s, envelope(7, 0, bytes([0x01, 0x00, 0x01])), ADDR, 0.0)
+
+        self.assertEqual(received, [1, 2])
+        self.assertEqual(s.sendto.call_count, 2)
+
+
+class TestReliableDelivery(unittest.TestCase):
+    def test_lost_commands_are_retransmitted_in_order(self):
+        received = []
+        done = threading.Event()
+
+        def callback(command):
+            received.append(command['color'])
+            if len(received) == 20:
+                done.set()
+
+        server = UDPServer('127.0.0.1', 0, callback)
+        server.start()
+        self.assertTrue(server.ready.wait(2))
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender = ReliableSender(sock, ('127.0.0.1', server.port), rto=0.02)
+        real_sendto = sock.sendto
+        dropped = set()
+
+        def lossy_sendto(data, address):
+            seq = ENVELOPE.unpack_from(data)[2]
+            # Перша передача кожного третього пакета губиться
+            if seq % 3 == 0 and seq not in dropped:
+                dropped.add(seq)
+                return len(data)
+            return real_sendto(data, address)
+
+        sender.sock = type('LossySocket', (), {
+            'sendto': staticmethod(lossy_sendto),
+            'recvfrom': sock.recvfrom,
+            'settimeout': sock.settimeout,
+            'gettimeout': sock.gettimeout,
+        })()
+        try:
+            for color in range(20):
+                sender.send(bytes([0x01, 0x00, color]))
+            self.assertTrue(sender.flush(2))
+            self.assertTrue(done.wait(2))
+            self.assertEqual(received, list(range(20)))
+            self.assertGreaterEqual(sender.retransmissions, len(dropped))
+        finally:
+            server.stop()
+            sock.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
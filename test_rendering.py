@@ -0,0 +1,368 @@
+"""
+Еталонні кадри DisplayDrawer.
+
+Кожен сценарій - послідовність розібраних команд, яку малюють на чистому
+DisplayDrawer. Кадр порівнюється з еталоном у golden_frames/<сценарій>.png:
+точно (піксель у піксель) для примітивів, що малюються власним
+растеризатором або простими заливками, і за перцептивним хешем для
+виводу Pillow (лінії, контури, текст), який може трохи змінюватися між
+версіями Pillow. Перцептивне порівняння поєднує хеш для загальної
+структури кадру з попіксельною перевіркою з допуском зсуву на 1 піксель,
+бо дрібна фігура чи рядок тексту майже не змінюють хеш. Середній час
+одного проходу сценарію порівнюється з базовим у golden_frames/timings.json.
+
+Оновлення еталонів після навмисної зміни малювання:
+    UPDATE_GOLDEN=1 python -m pytest test_rendering.py
+"""
+import json
+import os
+import random
+import tempfile
+import time
+import unittest
+from PIL import Image, ImageChops, ImageFilter
+from display_drawer import DisplayDrawer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_DIR = os.path.join(HERE, 'golden_frames')
+TIMINGS_PATH = os.path.join(GOLDEN_DIR, 'timings.json')
+
+WIDTH, HEIGHT = 320, 240
+
+UPDATE_GOLDEN = bool(os.environ.get('UPDATE_GOLDEN'))
+
+# Допустима відстань Хеммінга між перцептивними хешами (з 768 біт)
+HASH_TOLERANCE = 24
+
+# Допустима кількість пікселів, що відрізняються від усіх сусідів еталона
+# (і навпаки) більш ніж на PIXEL_THRESHOLD рівнів яскравості
+PIXEL_TOLERANCE = WIDTH * HEIGHT // 1000
+PIXEL_THRESHOLD = 16
+
+# Сповільнення відносно базового часу, після якого тест падає; базовий час
+# записаний на іншій машині, тож запас великий
+TIME_TOLERANCE = float(os.environ.get('RENDER_TIME_TOLERANCE', '3.0'))
+# Кожен замір повторює сценарій, поки сумарний час малювання не досягне
+# MIN_RUN_SECONDS, і береться середній час одного проходу: дрібні сценарії
+# інакше тривають кілька десятків мікросекунд і тонуть у шумі таймера
+MIN_RUN_SECONDS = 0.02
+REPEATS = 5
+
+
+def cmd(command_id, **fields):
+    fields['command_id'] = command_id
+    return fields
+
+
+def clear_commands():
+    return [cmd(0x05, x0=10, y0=10, w=100, h=80, color=0xFFFF), cmd(0x01, color=0)]
+
+
+def pixel_commands():
+    return [cmd(0x02, x=x, y=y, color=(x * 31 + y * 7) & 0xFFFF)
+            for x in range(0, WIDTH, 13) for y in range(0, HEIGHT, 11)]
+
+
+def line_commands():
+    return [
+        cmd(0x03, x0=0, y0=0, x1=WIDTH - 1, y1=HEIGHT - 1, color=0xF800),
+        cmd(0x03, x0=WIDTH - 1, y0=0, x1=0, y1=HEIGHT - 1, color=0x07E0),
+        cmd(0x03, x0=10, y0=120, x1=310, y1=120, color=0x001F),
+        cmd(0x03, x0=160, y0=5, x1=160, y1=235, color=0xFFE0),
+        cmd(0x03, x0=-200, y0=50, x1=500, y1=90, color=0xF81F),
+    ]
+
+
+def rectangle_commands():
+    return [
+        cmd(0x04, x0=10, y0=10, w=120, h=80, color=0xF800),
+        cmd(0x05, x0=40, y0=40, w=60, h=30, color=0x07E0),
+        cmd(0x05, x0=-20, y0=-20, w=50, h=50, color=0x001F),
+        cmd(0x04, x0=200, y0=150, w=200, h=200, color=0xFFFF),
+    ]
+
+
+def ellipse_commands():
+    return [
+        cmd(0x06, x0=20, y0=20, radius_x=120, radius_y=80, color=0xF800),
+        cmd(0x07, x0=180, y0=40, radius_x=100, radius_y=150, color=0x07E0),
+        cmd(0x08, x0=80, y0=180, radius=40, color=0x001F),
+        cmd(0x09, x0=260, y0=200, radius=25, color=0xFFE0),
+    ]
+
+
+def clipped_ellipse_commands():
+    # Фігури переважно за межами поверхні малює власний растеризатор
+    return [
+        cmd(0x06, x0=-900, y0=-600, radius_x=1200, radius_y=900, color=0xF800),
+        cmd(0x07, x0=250, y0=-400, radius_x=800, radius_y=800, color=0x07E0),
+        cmd(0x08, x0=-100, y0=300, radius=300, color=0x001F),
+        cmd(0x09, x0=400, y0=260, radius=200, color=0xFFE0),
+    ]
+
+
+def rounded_rectangle_commands():
+    return [
+        cmd(0x0A, x0=10, y0=10, w=140, h=90, radius=15, color=0xF800),
+        cmd(0x0B, x0=170, y0=30, w=120, h=150, radius=30, color=0x07E0),
+        cmd(0x0B, x0=30, y0=130, w=100, h=80, radius=5, color=0x001F),
+    ]
+
+
+def clipped_rounded_rectangle_commands():
+    return [
+        cmd(0x0A, x0=-500, y0=-300, w=900, h=700, radius=120, color=0xF800),
+        cmd(0x0B, x0=200, y0=100, w=900, h=900, radius=200, color=0x07E0),
+        cmd(0x0B, x0=-800, y0=150, w=900, h=200, radius=60, color=0x001F),
+    ]
+
+
+def text_commands():
+    return [
+        cmd(0x0C, x0=10, y0=10, color=0xFFFF, font_number=1, text="Display module"),
+        cmd(0x0C, x0=10, y0=40, color=0xF800, font_number=1, text="0123456789 !?#"),
+        cmd(0x0C, x0=200, y0=220, color=0x07E0, font_number=1, text="clipped text at the edge"),
+    ]
+
+
+def present_commands():
+    # Кадр 1 показаний, кадр 2 намальований без Present і не має потрапити на екран
+    return [
+        cmd(0x05, x0=20, y0=20, w=100, h=100, color=0xF800),
+        cmd(0x0D),
+        cmd(0x01, color=0),
+        cmd(0x05, x0=150, y0=100, w=100, h=100, color=0x07E0),
+    ]
+
+
+def clip_viewport_commands():
+    # Логічна область 160x120 на всю поверхню з відсіканням частини фігур
+    return [
+        cmd(0x0F, x0=0, y0=0, w=WIDTH, h=HEIGHT, logical_w=160, logical_h=120),
+        cmd(0x0E, x0=20, y0=15, w=100, h=80),
+        cmd(0x07, x0=0, y0=0, radius_x=90, radius_y=70, color=0xF800),
+        cmd(0x03, x0=0, y0=110, x1=160, y1=0, color=0x07E0),
+        cmd(0x0A, x0=60, y0=40, w=90, h=70, radius=8, color=0x001F),
+        cmd(0x0C, x0=10, y0=50, color=0xFFFF, font_number=1, text="clipped by the clip region"),
+        cmd(0x0E, x0=0, y0=0, w=0, h=0),
+        cmd(0x09, x0=150, y0=110, radius=20, color=0xFFE0),
+        cmd(0x0F, x0=0, y0=0, w=0, h=0, logical_w=0, logical_h=0),
+        cmd(0x02, x=0, y=0, color=0xFFFF),
+    ]
+
+
+def random_commands(seed, count=300):
+    """Випадкова послідовність усіх команд з координатами і за межами поверхні."""
+    rng = random.Random(seed)
+
+    def coordinate(limit):
+        return rng.randint(-limit // 2, limit + limit // 2)
+
+    commands = []
+    for _ in range(count):
+        command_id = rng.choice([0x02, 0x03, 0x04, 0x05, 0x06, 0x07, 0x08,
+                                 0x09, 0x0A, 0x0B, 0x0C])
+        color = rng.randint(0, 0xFFFF)
+        x0, y0 = coordinate(WIDTH), coordinate(HEIGHT)
+        w, h = rng.randint(0, WIDTH), rng.randint(0, HEIGHT)
+        if command_id == 0x02:
+            commands.append(cmd(command_id, x=x0, y=y0, color=color))
+        elif command_id == 0x03:
+            commands.append(cmd(command_id, x0=x0, y0=y0, x1=coordinate(WIDTH), y1=coordinate(HEIGHT),
+                                color=color))
+        elif command_id in (0x04, 0x05):
+            commands.append(cmd(command_id, x0=x0, y0=y0, w=w, h=h, color=color))
+        elif command_id in (0x06, 0x07):
+            commands.append(cmd(command_id, x0=x0, y0=y0, radius_x=w, radius_y=h, color=color))
+        elif command_id in (0x08, 0x09):
+            commands.append(cmd(command_id, x0=x0, y0=y0, radius=rng.randint(0, HEIGHT), color=color))
+        elif command_id in (0x0A, 0x0B):
+            commands.append(cmd(command_id, x0=x0, y0=y0, w=w, h=h, radius=rng.randint(0, 40), color=color))
+        else:
+            commands.append(cmd(command_id, x0=x0, y0=y0, color=color, font_number=1,
+                                text=''.join(rng.choice('abcXYZ019 ') for _ in range(rng.randint(1, 12)))))
+    return commands
+
+
+# Ім'я -> (команди, точне порівняння, подвійна буферизація)
+SCENARIOS = {
+    'clear': (clear_commands(), True, False),
+    'pixels': (pixel_commands(), True, False),
+    'lines': (line_commands(), False, False),
+    'rectangles': (rectangle_commands(), True, False),
+    'ellipses': (ellipse_commands(), False, False),
+    'ellipses_clipped': (clipped_ellipse_commands(), True, False),
+    'rounded_rectangles': (rounded_rectangle_commands(), False, False),
+    'rounded_rectangles_clipped': (clipped_rounded_rectangle_commands(), True, False),
+    'text': (text_commands(), False, False),
+    'present': (present_commands(), True, True),
+    'clip_viewport': (clip_viewport_commands(), False, False),
+    'random_1': (random_commands(1), False, False),
+    'random_2': (random_commands(2), False, False),
+    'random_3': (random_commands(3), False, False),
+}
+
+
+def render(commands, double_buffered=False):
+    """
+    Малювання послідовності команд на чистому DisplayDrawer.
+
+    Returns:
+        tuple: (показаний кадр, час малювання в секундах)
+    """
+    drawer = DisplayDrawer(WIDTH, HEIGHT, double_buffered)
+    # Завантаження шрифту - разова вартість, а не малювання
+    drawer.font
+    start = time.perf_counter()
+    for command in commands:
+        drawer.render(command)
+    elapsed = time.perf_counter() - start
+    return drawer.get_image(), elapsed
+
+
+def time_per_run(commands, double_buffered=False):
+    """
+    Малювання сценарію на чистих DisplayDrawer, поки сумарний час не
+    досягне MIN_RUN_SECONDS.
+
+    Returns:
+        tuple: (показаний кадр, середній час одного проходу в секундах)
+    """
+    total = 0.0
+    runs = 0
+    while total < MIN_RUN_SECONDS:
+        image, elapsed = render(commands, double_buffered)
+        total += elapsed
+        runs += 1
+    return image, total / runs
+
+
+def perceptual_hash(image, size=16):
+    """
+    Різницевий хеш (dHash) окремо для кожного каналу RGB.
+
+    Кадр зменшується до (size + 1) x size з усередненням, і кожен біт
+    показує, чи яскравіший піксель за сусіда праворуч. Дрібні відмінності
+    згладжування майже не змінюють хеш, а зникла фігура чи інший колір - змінює.
+
+    Returns:
+        int: Хеш довжиною 3 * size * size біт
+    """
+    value = 0
+    for channel in image.convert('RGB').split():
+        small = channel.resize((size + 1, size), Image.Resampling.BOX)
+        pixels = small.load()
+        for y in range(size):
+            for x in range(size):
+                value = (value << 1) | (pixels[x, y] > pixels[x + 1, y])
+    return value
+
+
+def _outside_neighbourhood(actual, golden):
+    lower = golden.filter(ImageFilter.MinFilter(3))
+    upper = golden.filter(ImageFilter.MaxFilter(3))
+    excess = ImageChops.lighter(ImageChops.subtract(lower, actual), ImageChops.subtract(actual, upper))
+    mask = excess.convert('L').point(lambda v: 255 if v > PIXEL_THRESHOLD else 0)
+    return mask.histogram()[255]
+
+
+def mismatched_pixels(actual, golden):
+    """
+    Кількість пікселів, яких немає в околі 3x3 відповідного пікселя іншого кадру.
+
+    Перевірка симетрична: зникла тонка лінія не ховається за MinFilter еталона.
+    """
+    return _outside_neighbourhood(actual, golden) + _outside_neighbourhood(golden, actual)
+
+
+def perceptual_difference(actual, golden):
+    """
+    Returns:
+        Optional[str]: Опис розбіжності або None, якщо кадри перцептивно однакові
+    """
+    distance = bin(perceptual_hash(actual) ^ perceptual_hash(golden)).count('1')
+    if distance > HASH_TOLERANCE:
+        return f"perceptual hash distance {distance} > {HASH_TOLERANCE}"
+    mismatched = mismatched_pixels(actual, golden)
+    if mismatched > PIXEL_TOLERANCE:
+        return f"{mismatched} mismatched pixels > {PIXEL_TOLERANCE}"
+    return None
+
+
+def golden_path(name):
+    return os.path.join(GOLDEN_DIR, f'{name}.png')
+
+
+def load_timings():
+    if not os.path.exists(TIMINGS_PATH):
+        return {}
+    with open(TIMINGS_PATH) as f:
+        return json.load(f)
+
+
+class TestRendering(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.frames = {}
+        cls.timings = {}
+        for name, (commands, _, double_buffered) in SCENARIOS.items():
+            best = None
+            for _ in range(REPEATS):
+                image, elapsed = time_per_run(commands, double_buffered)
+                best = elapsed if best is None else min(best, elapsed)
+            cls.frames[name] = image
+            cls.timings[name] = best * 1000
+
+        if UPDATE_GOLDEN:
+            os.makedirs(GOLDEN_DIR, exist_ok=True)
+            for name, image in cls.frames.items():
+                image.save(golden_path(name), optimize=True)
+            with open(TIMINGS_PATH, 'w') as f:
+                json.dump({name: round(ms, 3) for name, ms in cls.timings.items()}, f, indent=2, sort_keys=True)
+                f.write('\n')
+
+    def save_actual(self, name, image):
+        path = os.path.join(tempfile.gettempdir(), f'{name}.actual.png')
+        image.save(path)
+        return path
+
+    def test_frames_match_golden(self):
+        for name, (_, exact, _) in SCENARIOS.items():
+            with self.subTest(scenario=name):
+                path = golden_path(name)
+                self.assertTrue(os.path.exists(path), f"No golden frame for {name}; run with UPDATE_GOLDEN=1")
+                with Image.open(path) as golden:
+                    golden = golden.convert('RGB')
+                actual = self.frames[name]
+                if exact:
+                    if actual.tobytes() != golden.tobytes():
+                        self.fail(f"{name} differs from golden frame, actual saved to "
+                                  f"{self.save_actual(name, actual)}")
+                else:
+                    difference = perceptual_difference(actual, golden)
+                    if difference is not None:
+                        self.fail(f"{name}: {difference}, actual saved to {self.save_actual(name, actual)}")
+
+    def test_render_time_within_baseline(self):
+        baseline = load_timings()
+        for name in SCENARIOS:
+            with self.subTest(scenario=name):
+                self.assertIn(name, baseline, f"No baseline time for {name}; run with UPDATE_GOLDEN=1")
+                limit = baseline[name] * TIME_TOLERANCE
+                self.assertLessEqual(self.timings[name], limit,
+                                     f"{name} rendered in {self.timings[name]:.2f} ms, "
+                                     f"baseline {baseline[name]:.2f} ms")
+
+    def test_perceptual_comparison_tolerates_drift_but_not_missing_content(self):
+        # Перевірка самого порівняння: зсув на піксель допустимий, зникла фігура чи рядок - ні
+        for commands in (ellipse_commands(), text_commands()):
+            full, _ = render(commands)
+            shifted = full.transform(full.size, Image.Transform.AFFINE, (1, 0, -1, 0, 1, 0))
+            self.assertIsNone(perceptual_difference(shifted, full))
+            for i in range(len(commands)):
+                partial, _ = render(commands[:i] + commands[i + 1:])
+                self.assertIsNotNone(perceptual_difference(partial, full))
+
+
+if __name__ == '__main__':
+    unittest.main()
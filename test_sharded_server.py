@@ -0,0 +1,75 @@
+import logging
+import socket
+import threading
+import unittest
+from sharded_server import CommandRing, ShardedUDPServer, decode_command, encode_command
+
+
+def setUpModule():
+    logging.disable(logging.CRITICAL)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+class TestCommandCodec(unittest.TestCase):
+    def test_round_trip(self):
+        commands = [
+            {'command_id': 0x01, 'color': 0xFFFF},
+            {'command_id': 0x02, 'x': -5, 'y': 200, 'color': 0x07E0},
+            {'command_id': 0x0A, 'x0': 1, 'y0': 2, 'w': 3, 'h': 4, 'radius': 5, 'color': 6},
+            {'command_id': 0x0C, 'x0': 1, 'y0': 2, 'color': 3, 'font_number': 1, 'text': "Привіт"},
+            {'command_id': 0x0D},
+            {'command_id': 0x0F, 'x0': -1, 'y0': 2, 'w': 1024, 'h': 768, 'logical_w': 320, 'logical_h': 240},
+        ]
+        for command in commands:
+            self.assertEqual(decode_command(encode_command(command)), command)
+
+
+class TestCommandRing(unittest.TestCase):
+    def test_fifo_and_full(self):
+        ring = CommandRing(slots=4)
+        reader = CommandRing(ring.name)
+        try:
+            for i in range(4):
+                self.assertTrue(ring.put(bytes([i])))
+            self.assertFalse(ring.put(b'x'))
+            self.assertEqual([reader.get() for _ in range(4)], [bytes([i]) for i in range(4)])
+            self.assertIsNone(reader.get())
+            self.assertTrue(ring.put(b'again'))
+            self.assertEqual(reader.get(), b'again')
+        finally:
+            reader.close()
+            ring.close()
+
+
+class TestShardedUDPServer(unittest.TestCase):
+    def test_per_sender_order(self):
+        received = {}
+        done = threading.Event()
+
+        def callback(command):
+            received.setdefault(command['x'], []).append(command['y'])
+            if sum(map(len, received.values())) == 3 * 50:
+                done.set()
+
+        server = ShardedUDPServer('127.0.0.1', 0, callback, workers=2)
+        server.start()
+        senders = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(3)]
+        try:
+            self.assertTrue(server.ready.wait(30))
+            for y in range(50):
+                for x, sock in enumerate(senders):
+                    sock.sendto(bytes([0x02, 0x00, x, 0x00, y, 0x00, 0x00]), ('127.0.0.1', server.port))
+            self.assertTrue(done.wait(10))
+            for x in range(3):
+                self.assertEqual(received[x], list(range(50)))
+        finally:
+            for sock in senders:
+                sock.close()
+            server.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
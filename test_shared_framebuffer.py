@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from PIL import Image
+from shared_framebuffer import SEQ_OFFSET, _SEQ, SharedFramebuffer, SharedFramebufferReader
+
+
+class TestSharedFramebuffer(unittest.TestCase):
+    def test_publish_and_read_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'frame.bin')
+            fb = SharedFramebuffer(4, 3, path=path)
+            reader = SharedFramebufferReader(path=path)
+            try:
+                self.assertEqual((reader.width, reader.height), (4, 3))
+                self.assertEqual(reader.frame_counter, 0)
+
+                image = Image.new('RGB', (4, 3), (10, 20, 30))
+                image.putpixel((1, 2), (255, 0, 128))
+                self.assertEqual(fb.publish(image), 1)
+
+                frame, pixels = reader.read_frame()
+                self.assertEqual(frame, 1)
+                self.assertEqual(bytes(pixels), image.tobytes())
+                self.assertEqual(bytes(reader.pixels), image.tobytes())
+            finally:
+                reader.close()
+                fb.close()
+
+    def test_publish_and_read_shared_memory(self):
+        fb = SharedFramebuffer(2, 2)
+        try:
+            reader = SharedFramebufferReader(name=fb.name)
+            image = Image.new('RGB', (2, 2), (1, 2, 3))
+            fb.publish(image)
+            fb.publish(image)
+            seq = reader.begin_read()
+            self.assertEqual(reader.frame_counter, 2)
+            self.assertEqual(bytes(reader.pixels), bytes([1, 2, 3]) * 4)
+            self.assertTrue(reader.validate(seq))
+            reader.close()
+        finally:
+            fb.close()
+            fb.unlink()
+
+    def test_publish_wrong_size(self):
+        fb = SharedFramebuffer(2, 2)
+        try:
+            with self.assertRaises(ValueError):
+                fb.publish(Image.new('RGB', (3, 2)))
+        finally:
+            fb.close()
+            fb.unlink()
+
+    def test_reader_times_out_on_abandoned_write(self):
+        fb = SharedFramebuffer(2, 2)
+        try:
+            reader = SharedFramebufferReader(name=fb.name)
+            # Виробник завершився посеред publish(): seq лишився непарним
+            _SEQ.pack_into(fb._buffer, SEQ_OFFSET, 1)
+            with self.assertRaises(TimeoutError):
+                reader.begin_read(timeout=0.05)
+            with self.assertRaises(TimeoutError):
+                reader.read_frame(timeout=0.05)
+            reader.close()
+        finally:
+            fb.close()
+            fb.unlink()
+
+
+if __name__ == '__main__':
+    unittest.main()
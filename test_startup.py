@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Запас для повільних CI-машин; локально імпорт займає кілька десятків мс
+IMPORT_BUDGET_US = 300_000
+
+
+def import_times(module, statement=None):
+    """
+    Імпорт модуля в чистому інтерпретаторі з -X importtime.
+
+    Returns:
+        dict: Ім'я модуля -> кумулятивний час імпорту в мікросекундах
+    """
+    code = statement or f"import {module}"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=HERE, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestHeadlessStartup(unittest.TestCase):
+    def test_headless_import_excludes_gui_and_pillow(self):
+        times = import_times('headless')
+        for heavy in ('tkinter', 'PIL', 'numpy'):
+            self.assertNotIn(heavy, times, f"{heavy} must not be imported by headless")
+
+    def test_headless_import_time(self):
+        times = import_times('headless')
+        self.assertLess(times['headless'], IMPORT_BUDGET_US)
+
+    def test_parser_import_leaves_logging_unconfigured(self):
+        code = "import logging, command_parser; assert not logging.getLogger().handlers"
+        subprocess.run([sys.executable, '-c', code], cwd=HERE, check=True)
+
+    def test_pillow_loaded_on_first_drawer(self):
+        times = import_times(None, "import headless; headless.DisplayDrawer(8, 8)")
+        self.assertIn('PIL.Image', times)
+        self.assertNotIn('tkinter', times)
+
+
+if __name__ == '__main__':
+    unittest.main()
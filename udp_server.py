@@ -1,16 +1,43 @@
 import socket
 import threading
 import logging
+import time
+from collections import OrderedDict
 from typing import Optional, Callable
-from command_parser import DisplayCommandParser  
+from command_parser import REJECT_BAD_LENGTH, DisplayCommandParser
+from feedback import FEEDBACK_INTERVAL, FEEDBACK_SUBSCRIBE, MAX_SUBSCRIBERS, SUBSCRIPTION_TTL, ServerStats
+from reliable import RELIABLE_MAGIC, ReliableReceiver
 
 class UDPServer:
-    def __init__(self, host: str, port: int, command_callback: Callable):
+    """
+    UDP-сервер команд дисплея.
+
+    command_callback отримує словник у форматі DisplayCommandParser.parse
+    з одним додатковим ключем 'received_at' - час отримання пакета за
+    time.monotonic(). Споживач, що малює асинхронно, повертає той самий
+    словник у command_done(), і з цього часу рахується затримка малювання
+    для зворотного зв'язку. Інших ключів сервер не додає.
+    """
+
+    def __init__(self, host: str, port: int, command_callback: Callable, reuse_port: bool = False,
+                 max_subscribers: int = MAX_SUBSCRIBERS):
         self.host = host
         self.port = port
+        # SO_REUSEPORT дозволяє кільком процесам слухати той самий порт
+        self.reuse_port = reuse_port
         self.command_callback = command_callback
         self.running = False
         self.command_parser = DisplayCommandParser()  
+        # Стан надійної доставки для відправників, що використовують конверт
+        self.reliable = ReliableReceiver()
+        # Встановлюється, коли сокет прив'язаний; port містить фактичний порт
+        self.ready = threading.Event()
+        # Лічильники та підписники на зворотний зв'язок: адреса -> [час
+        # підписки, чи надходили від неї команди з попередньої розсилки]
+        self.stats = ServerStats()
+        self.subscribers = OrderedDict()
+        self.max_subscribers = max_subscribers
+        self._last_feedback = 0.0
         
         
         self.logger = logging.getLogger('UDPServer')
@@ -34,7 +61,8 @@ class UDPServer:
         """
         try:
             if len(data) < 1:
-                self.logger.error("Received empty packet")
+                # Порожні датаграми рахуються разом з іншими відхиленими пакетами
+                self.command_parser.rejections.record(REJECT_BAD_LENGTH)
                 return None
             
             parsed_command = self.command_parser.parse(data)
@@ -42,7 +70,8 @@ class UDPServer:
                 self.logger.info(f"Received command: {parsed_command}")
                 return parsed_command
             else:
-                self.logger.error("Failed to parse command")
+                # Причини відхилення агрегує DisplayCommandParser.rejections
+                self.logger.debug("Failed to parse command")
                 return None
             
         except Exception as e:
@@ -62,26 +91,120 @@ class UDPServer:
             self.thread.join()
         self.logger.info("UDP server stopped")
 
+    def command_done(self, command_data: dict):
+        """
+        Позначка, що команду намальовано.
+
+        Споживач, який малює команди асинхронно (наприклад, у потоці GUI),
+        викликає цей метод, щоб відправники бачили глибину черги і затримку.
+
+        Args:
+            command_data: Словник, переданий у command_callback (з ключем 'received_at')
+        """
+        received_at = command_data.get('received_at')
+        if received_at is not None:
+            self.stats.command_done(received_at)
+
+    def _dispatch(self, data: bytes, received_at: float) -> bool:
+        parsed_command = self.validate_and_parse_packet(data)
+        if not parsed_command:
+            return False
+        if self.command_callback:
+            parsed_command['received_at'] = received_at
+            self.stats.dispatched += 1
+            try:
+                self.command_callback(parsed_command)
+            except Exception as e:
+                self.logger.error(f"Error in command callback: {str(e)}")
+        return True
+
+    def _handle_envelope(self, s: socket.socket, data: bytes, addr, received_at: float) -> bool:
+        payloads, ack = self.reliable.receive(data, addr, received_at)
+        # Команди вже прийняті ReliableReceiver і повторно не прийдуть,
+        # тож виконуються до підтвердження, а збій відправки його не скасовує
+        for payload in payloads:
+            self._dispatch(payload, received_at)
+        if ack is not None:
+            try:
+                s.sendto(ack, addr)
+            except OSError as e:
+                self.logger.debug(f"Failed to send ack to {addr}: {str(e)}")
+        return ack is not None
+
+    def _subscribe(self, addr, now: float):
+        subscription = self.subscribers.get(addr)
+        if subscription is not None:
+            subscription[0] = now
+            self.subscribers.move_to_end(addr)
+            return
+        self.subscribers[addr] = [now, False]
+        if len(self.subscribers) > self.max_subscribers:
+            self.subscribers.popitem(last=False)
+
+    def _publish_feedback(self, s: socket.socket):
+        now = time.monotonic()
+        if not self.subscribers or now - self._last_feedback < FEEDBACK_INTERVAL:
+            return
+        self._last_feedback = now
+
+        expired = [addr for addr, (since, _) in self.subscribers.items() if now - since > SUBSCRIPTION_TTL]
+        for addr in expired:
+            del self.subscribers[addr]
+        if not self.subscribers:
+            s.settimeout(0.1)
+            return
+
+        # Один пакет зворотного зв'язку на щонайменше одну команду від підписника
+        active = [addr for addr, (_, sent) in self.subscribers.items() if sent]
+        if not active:
+            return
+        rejected = sum(self.command_parser.rejections.counters.values())
+        packet = self.stats.encode(s, rejected)
+        for addr in active:
+            self.subscribers[addr][1] = False
+            try:
+                s.sendto(packet, addr)
+            except OSError as e:
+                self.logger.debug(f"Failed to send feedback to {addr}: {str(e)}")
+
     def _run_server(self):
         with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
             try:
+                if self.reuse_port:
+                    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
                 s.bind((self.host, self.port))
+                self.port = s.getsockname()[1]
+                self.ready.set()
                 s.settimeout(0.1)
                 self.logger.info(f"UDP server listening on {self.host}:{self.port}")
 
                 while self.running:
+                    # Звіт про вікно відхилень не чекає ні тиші, ні наступного відхилення
+                    self.command_parser.rejections.flush_if_due()
                     try:
                         data, addr = s.recvfrom(1024)
+                        received_at = time.monotonic()
                         self.logger.debug(f"Raw data from {addr}: {data.hex()}")
-                        
-                        parsed_command = self.validate_and_parse_packet(data)
-                        if parsed_command and self.command_callback:
-                            try:
-                                self.command_callback(parsed_command)
-                            except Exception as e:
-                                self.logger.error(f"Error in command callback: {str(e)}")
-                        
+                        self.stats.on_received(len(data))
+
+                        if data and data[0] == RELIABLE_MAGIC:
+                            accepted = self._handle_envelope(s, data, addr, received_at)
+                        elif data == bytes([FEEDBACK_SUBSCRIBE]):
+                            self._subscribe(addr, received_at)
+                            s.settimeout(FEEDBACK_INTERVAL)
+                            accepted = False
+                        else:
+                            accepted = self._dispatch(data, received_at)
+
+                        if accepted and self.subscribers:
+                            subscription = self.subscribers.get(addr)
+                            if subscription is not None:
+                                subscription[1] = True
+
+                        self._publish_feedback(s)
+
                     except socket.timeout:
+                        self._publish_feedback(s)
                         continue
                     except Exception as e:
                         if self.running:
@@ -0,0 +1,66 @@
+class Viewport:
+    """
+    Перетворення логічних координат відправника в пікселі панелі.
+
+    Команда SetViewport (0x0F) відображає логічну область
+    logical_w x logical_h на прямокутник панелі (x0, y0, w, h):
+    X = x0 + x * w / logical_w, Y = y0 + y * h / logical_h.
+
+    Координати округлюються до найближчого цілого (половини - до парного,
+    як round() і numpy.rint), тож DisplayDrawer.render і пакетне
+    перетворення CommandBatch.apply_viewport дають однакові пікселі.
+    Ненульові розміри не зменшуються до нуля, щоб фігура не зникала при
+    зменшенні масштабу.
+    """
+
+    def __init__(self, scale_x=1.0, scale_y=1.0, offset_x=0, offset_y=0):
+        self.scale_x = scale_x
+        self.scale_y = scale_y
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.identity = scale_x == 1.0 and scale_y == 1.0 and offset_x == 0 and offset_y == 0
+
+    @classmethod
+    def from_command(cls, command_data):
+        """
+        Viewport з розібраної команди SetViewport.
+
+        Нульова логічна ширина або висота скидає перетворення.
+        """
+        logical_w, logical_h = command_data['logical_w'], command_data['logical_h']
+        if not logical_w or not logical_h:
+            return cls()
+        return cls(command_data['w'] / logical_w, command_data['h'] / logical_h,
+                   command_data['x0'], command_data['y0'])
+
+    def point(self, x, y):
+        if self.identity:
+            return x, y
+        return round(self.offset_x + x * self.scale_x), round(self.offset_y + y * self.scale_y)
+
+    def size(self, w, h):
+        if self.identity:
+            return w, h
+        return _scale_size(w, self.scale_x), _scale_size(h, self.scale_y)
+
+    def radius(self, radius):
+        """Радіус заокруглення кутів; при різних масштабах осей - за меншим."""
+        if self.identity:
+            return radius
+        return _scale_size(radius, min(self.scale_x, self.scale_y))
+
+    def circle_box(self, x, y, radius):
+        """
+        Коло з центром (x, y) як еліпс (x0, y0, w, h) у пікселях панелі.
+
+        При різних масштабах осей коло стає еліпсом.
+        """
+        x0, y0 = self.point(x - radius, y - radius)
+        w, h = self.size(2 * radius, 2 * radius)
+        return x0, y0, w, h
+
+
+def _scale_size(value, scale):
+    if not value:
+        return 0
+    return max(round(value * scale), 1)